@@ -1,14 +1,17 @@
 from fastapi import FastAPI, Request, Depends
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-import uvicorn
 import os
 
-from .database import get_db, create_tables
-from .routers import chef, customer, admin, feedback, loyalty, selection_offer, table, analytics, settings
+from .database import get_db, async_engine
+from .migrations import check_schema
+from .utils.pdf_generator import bill_renderer
+from .utils.static_files import CachedStaticFiles
+from .utils.metrics import MetricsMiddleware, metrics
+from .utils.query_counter import QueryCounterMiddleware, DB_QUERY_COUNTER
+from .routers import chef, customer, admin, feedback, loyalty, selection_offer, table, analytics, settings, export
 
 # Create FastAPI app
 app = FastAPI(title="Tabble - Hotel Management App")
@@ -22,8 +25,16 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Count the SQL statements of each request (X-DB-Queries, Server-Timing) and
+# log suspected N+1 queries
+if DB_QUERY_COUNTER:
+    app.add_middleware(QueryCounterMiddleware)
+
+# Record request counts, latencies and status codes per route for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
 
 # Setup templates
 templates = Jinja2Templates(directory="templates")
@@ -38,9 +49,31 @@ app.include_router(selection_offer.router)
 app.include_router(table.router)
 app.include_router(analytics.router)
 app.include_router(settings.router)
+app.include_router(export.router)
+
+# Refuse to start on a database that needs migrating; apply migrations with
+# python -m app.migrations upgrade (run.py does this before starting)
+check_schema()
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# Close the async engine's pooled connections; aiosqlite runs each connection
+# in its own thread, which otherwise keeps the process from exiting
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+
+
+# Stop the bill rendering worker processes
+@app.on_event("shutdown")
+def stop_bill_renderer():
+    bill_renderer.shutdown()
 
-# Create database tables
-create_tables()
 
 # Check if we have the React build folder
 react_build_dir = "frontend/build"
@@ -48,7 +81,7 @@ has_react_build = os.path.isdir(react_build_dir)
 
 if has_react_build:
     # Mount the React build folder
-    app.mount("/", StaticFiles(directory=react_build_dir, html=True), name="react")
+    app.mount("/", CachedStaticFiles(directory=react_build_dir, html=True), name="react")
 
 
 # Root route - serve React app in production, otherwise serve index.html template
@@ -123,4 +156,7 @@ async def dish_analysis_page(request: Request):
 
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Production and development launchers live in run.py
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
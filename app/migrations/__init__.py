@@ -0,0 +1,118 @@
+"""
+Versioned schema migrations
+
+Each migration is a module in this package with an upgrade(connection)
+function, listed in MIGRATIONS in the order it must run. Applied versions
+are recorded in the schema_version table; every migration runs in its own
+transaction together with its version row.
+
+Migrations carry their own DDL and never read the models, which keep
+changing: 0001 creates the missing tables from a frozen copy of the schema
+as it was when migrations were introduced, and later migrations spell out
+their columns and indexes. Databases from before versioned migrations may
+already have some of those changes, so migrations check before they change
+anything (see has_column, and CREATE INDEX IF NOT EXISTS).
+
+Run pending migrations with:
+
+    python -m app.migrations upgrade
+
+Application startup only calls check_schema(), which compares versions and
+never changes the database.
+"""
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from datetime import datetime, timezone
+import importlib
+
+from ..database import engine, SchemaVersion
+
+# (version, module name), oldest first. Never renumber or remove entries;
+# add new migrations at the end.
+MIGRATIONS = [
+    (1, "m0001_baseline"),
+    (2, "m0002_selection_offer_discount"),
+    (3, "m0003_order_totals"),
+    (4, "m0004_order_and_rollup_indexes"),
+    (5, "m0005_dish_image_variants"),
+    (6, "m0006_hot_path_indexes"),
+    (7, "m0007_unique_sales_rollup_key"),
+    (8, "m0008_menu_version"),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+class SchemaOutdatedError(RuntimeError):
+    pass
+
+
+def has_column(connection, table: str, column: str) -> bool:
+    return column in {info["name"] for info in inspect(connection).get_columns(table)}
+
+
+def current_version(connection) -> int:
+    """
+    Highest applied migration, or 0 for a database without schema_version
+    """
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return 0
+    return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+
+def upgrade(bind=engine, target: int = LATEST_VERSION) -> int:
+    """
+    Apply every migration after the database's current version up to target
+
+    Returns:
+        int: Number of migrations applied
+    """
+    with bind.begin() as connection:
+        SchemaVersion.__table__.create(bind=connection, checkfirst=True)
+        version = current_version(connection)
+
+    applied = 0
+    for number, module_name in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_name}")
+        print(f"Applying migration {number}: {module_name}")
+        with bind.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(
+                SchemaVersion.__table__.insert().values(
+                    version=number,
+                    name=module_name,
+                    applied_at=datetime.now(timezone.utc),
+                )
+            )
+        applied += 1
+
+    return applied
+
+
+def check_schema(bind=engine):
+    """
+    Fail fast when the database is behind the code. A single plain query (no
+    schema reflection), so it adds about a millisecond to worker startup.
+
+    Raises:
+        SchemaOutdatedError: If migrations are pending
+        DBAPIError: If the database can't be reached or queried
+    """
+    with bind.connect() as connection:
+        try:
+            version = connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+        except DBAPIError:
+            # Only a missing schema_version table means a database from
+            # before versioned migrations; any other failure is reported
+            # as it is rather than as pending migrations
+            connection.rollback()
+            if inspect(connection).has_table(SchemaVersion.__tablename__):
+                raise
+            version = 0
+    if version < LATEST_VERSION:
+        raise SchemaOutdatedError(
+            f"Database schema is at version {version}, the code needs {LATEST_VERSION}. "
+            "Run: python -m app.migrations upgrade"
+        )
@@ -0,0 +1,26 @@
+import sys
+
+from . import upgrade, current_version, LATEST_VERSION, MIGRATIONS
+from ..database import engine
+
+
+def main(argv):
+    command = argv[0] if argv else "upgrade"
+
+    if command == "upgrade":
+        applied = upgrade()
+        print(f"Applied {applied} migration(s); schema is at version {LATEST_VERSION}")
+    elif command == "current":
+        with engine.connect() as connection:
+            version = current_version(connection)
+        print(f"Schema version {version} of {LATEST_VERSION}")
+        for number, name in MIGRATIONS:
+            print(f"  {'applied' if number <= version else 'pending'}  {number:04d} {name}")
+    else:
+        print("Usage: python -m app.migrations [upgrade|current]")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,166 @@
+# Create every baseline table that doesn't exist yet. Databases set up
+# before versioned migrations already have most of them; the later
+# migrations bring their columns and indexes up to date.
+#
+# The tables are a frozen copy of the models as they were when migrations
+# were introduced, so a fresh database goes through the same steps as an
+# old one. Never change them to match the models; add a migration instead.
+from sqlalchemy import (
+    MetaData,
+    Table,
+    Column,
+    Integer,
+    String,
+    Float,
+    ForeignKey,
+    DateTime,
+    Date,
+    Text,
+    Boolean,
+    Index,
+)
+
+metadata = MetaData()
+
+Table(
+    "dishes",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, index=True),
+    Column("description", Text, nullable=True),
+    Column("category", String, index=True),
+    Column("price", Float),
+    Column("quantity", Integer),
+    Column("image_path", String, nullable=True),
+    Column("thumbnail_path", String, nullable=True),
+    Column("image_webp_path", String, nullable=True),
+    Column("image_avif_path", String, nullable=True),
+    Column("discount", Float),
+    Column("is_offer", Integer),
+    Column("is_special", Integer),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "persons",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String, unique=True, index=True),
+    Column("password", String),
+    Column("phone_number", String, unique=True, index=True, nullable=True),
+    Column("visit_count", Integer),
+    Column("last_visit", DateTime),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "orders",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("table_number", Integer),
+    Column("unique_id", String, index=True),
+    Column("person_id", Integer, ForeignKey("persons.id"), nullable=True),
+    Column("status", String),
+    Column("total_amount", Float),
+    Column("item_count", Integer),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_orders_created_at_id", "created_at", "id"),
+)
+
+Table(
+    "order_items",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id")),
+    Column("dish_id", Integer, ForeignKey("dishes.id")),
+    Column("quantity", Integer),
+    Column("unit_price", Float, nullable=True),
+    Column("remarks", Text, nullable=True),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "feedback",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id")),
+    Column("person_id", Integer, ForeignKey("persons.id"), nullable=True),
+    Column("rating", Integer),
+    Column("comment", Text, nullable=True),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "loyalty_program",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("visit_count", Integer, unique=True),
+    Column("discount_percentage", Float),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "selection_offers",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("min_amount", Float),
+    Column("discount_amount", Float),
+    Column("is_active", Boolean),
+    Column("description", String, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "tables",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("table_number", Integer, unique=True),
+    Column("is_occupied", Boolean),
+    Column("current_order_id", Integer, ForeignKey("orders.id"), nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "daily_sales_rollup",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("date", Date, nullable=False),
+    Column("table_number", Integer),
+    Column("category", String, nullable=True),
+    Column("dish_id", Integer, nullable=True),
+    Column("order_count", Integer),
+    Column("quantity", Integer),
+    Column("revenue", Float),
+    Index("ix_daily_sales_rollup_key", "date", "table_number", "dish_id"),
+)
+
+Table(
+    "sales_rollup_state",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("rebuilt_at", DateTime),
+)
+
+Table(
+    "settings",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("hotel_name", String, nullable=False),
+    Column("address", String, nullable=True),
+    Column("contact_number", String, nullable=True),
+    Column("email", String, nullable=True),
+    Column("tax_id", String, nullable=True),
+    Column("logo_path", String, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(bind=connection, checkfirst=True)
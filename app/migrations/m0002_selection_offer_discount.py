@@ -0,0 +1,20 @@
+# Early databases created selection_offers without discount_amount. Startup
+# used to drop and recreate the table (losing every offer) to fix that; add
+# the column in place instead, with the discount rule fix_selection_offers.py
+# used for existing offers.
+from sqlalchemy import text
+
+from . import has_column
+
+
+def upgrade(connection):
+    if has_column(connection, "selection_offers", "discount_amount"):
+        return
+
+    connection.execute(text("ALTER TABLE selection_offers ADD COLUMN discount_amount FLOAT DEFAULT 0"))
+    connection.execute(text(
+        "UPDATE selection_offers SET discount_amount = CASE "
+        "WHEN min_amount <= 50 THEN 5.0 "
+        "WHEN min_amount <= 100 THEN 15.0 "
+        "ELSE 25.0 END"
+    ))
@@ -0,0 +1,33 @@
+# Add the stored order totals and item prices and backfill them from the
+# order items
+from sqlalchemy import text
+
+from . import has_column
+
+
+def upgrade(connection):
+    if not has_column(connection, "order_items", "unit_price"):
+        connection.execute(text("ALTER TABLE order_items ADD COLUMN unit_price FLOAT"))
+        # Best available price for historical items is the current dish price
+        connection.execute(text(
+            "UPDATE order_items SET unit_price = "
+            "(SELECT price FROM dishes WHERE dishes.id = order_items.dish_id) "
+            "WHERE unit_price IS NULL"
+        ))
+
+    has_total = has_column(connection, "orders", "total_amount")
+    has_count = has_column(connection, "orders", "item_count")
+    if has_total and has_count:
+        return
+
+    if not has_total:
+        connection.execute(text("ALTER TABLE orders ADD COLUMN total_amount FLOAT DEFAULT 0"))
+    if not has_count:
+        connection.execute(text("ALTER TABLE orders ADD COLUMN item_count INTEGER DEFAULT 0"))
+    connection.execute(text(
+        "UPDATE orders SET "
+        "total_amount = COALESCE((SELECT SUM(unit_price * quantity) FROM order_items "
+        "WHERE order_items.order_id = orders.id), 0), "
+        "item_count = (SELECT COUNT(*) FROM order_items "
+        "WHERE order_items.order_id = orders.id)"
+    ))
@@ -0,0 +1,14 @@
+# Indexes introduced after the orders and rollup tables existed, which
+# 0001 only creates along with a new table
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_orders_created_at_id ON orders (created_at, id)"
+    ))
+    # Replaced by a unique index in 0007
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_daily_sales_rollup_key "
+        "ON daily_sales_rollup (date, table_number, dish_id)"
+    ))
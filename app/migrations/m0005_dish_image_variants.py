@@ -0,0 +1,10 @@
+# Paths of the thumbnail and WebP/AVIF copies generated after an upload
+from sqlalchemy import text
+
+from . import has_column
+
+
+def upgrade(connection):
+    for column in ("thumbnail_path", "image_webp_path", "image_avif_path"):
+        if not has_column(connection, "dishes", column):
+            connection.execute(text(f"ALTER TABLE dishes ADD COLUMN {column} VARCHAR"))
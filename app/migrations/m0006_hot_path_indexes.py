@@ -0,0 +1,21 @@
+# Indexes behind the order, order item, feedback and dish filters of the
+# routers; audit_query_plans.py checks that the hot queries use them
+from sqlalchemy import text
+
+INDEXES = [
+    ("ix_orders_status_created_at", "orders", "status, created_at"),
+    ("ix_orders_person_id_created_at", "orders", "person_id, created_at"),
+    ("ix_orders_table_number_created_at", "orders", "table_number, created_at"),
+    ("ix_order_items_order_id", "order_items", "order_id"),
+    ("ix_order_items_dish_id", "order_items", "dish_id"),
+    ("ix_feedback_order_id", "feedback", "order_id"),
+    ("ix_feedback_person_id", "feedback", "person_id"),
+    ("ix_feedback_created_at", "feedback", "created_at"),
+    ("ix_dishes_is_offer", "dishes", "is_offer"),
+    ("ix_dishes_is_special", "dishes", "is_special"),
+]
+
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
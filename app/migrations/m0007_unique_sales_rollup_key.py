@@ -0,0 +1,38 @@
+# Make the sales rollup key unique so rollup updates can be a single
+# INSERT ... ON CONFLICT DO UPDATE. Rows duplicated by concurrent updates
+# before this migration are merged into the oldest row of their key first.
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    duplicates = connection.execute(text(
+        "SELECT date, table_number, dish_id FROM daily_sales_rollup "
+        "GROUP BY date, table_number, dish_id HAVING COUNT(*) > 1"
+    )).all()
+    for day, table_number, dish_id in duplicates:
+        rows = connection.execute(text(
+            "SELECT id, order_count, quantity, revenue FROM daily_sales_rollup "
+            "WHERE date = :day "
+            "AND COALESCE(table_number, -1) = COALESCE(:table_number, -1) "
+            "AND COALESCE(dish_id, -1) = COALESCE(:dish_id, -1) "
+            "ORDER BY id"
+        ), {"day": day, "table_number": table_number, "dish_id": dish_id}).all()
+        connection.execute(text(
+            "UPDATE daily_sales_rollup SET order_count = :order_count, quantity = :quantity, revenue = :revenue "
+            "WHERE id = :id"
+        ), {
+            "id": rows[0].id,
+            "order_count": sum(row.order_count or 0 for row in rows),
+            "quantity": sum(row.quantity or 0 for row in rows),
+            "revenue": sum(row.revenue or 0 for row in rows),
+        })
+        connection.execute(
+            text("DELETE FROM daily_sales_rollup WHERE id = :id"),
+            [{"id": row.id} for row in rows[1:]],
+        )
+
+    connection.execute(text("DROP INDEX IF EXISTS ix_daily_sales_rollup_key"))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_daily_sales_rollup_key ON daily_sales_rollup "
+        "(date, coalesce(table_number, -1), coalesce(dish_id, -1))"
+    ))
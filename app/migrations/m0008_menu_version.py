@@ -0,0 +1,13 @@
+# Menu version shared by every process that caches the customer menu
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS menu_version ("
+        "id INTEGER NOT NULL PRIMARY KEY, version INTEGER NOT NULL)"
+    ))
+    connection.execute(text(
+        "INSERT INTO menu_version (id, version) SELECT 1, 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM menu_version WHERE id = 1)"
+    ))
@@ -29,6 +29,9 @@ class DishUpdate(DishBase):
 class Dish(DishBase):
     id: int
     image_path: Optional[str] = None
+    thumbnail_path: Optional[str] = None
+    image_webp_path: Optional[str] = None
+    image_avif_path: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -17,6 +17,7 @@ class OrderItemCreate(OrderItemBase):
 class OrderItem(OrderItemBase):
     id: int
     order_id: int
+    unit_price: Optional[float] = None
     created_at: datetime
     dish: Optional[Dish] = None
 
@@ -49,6 +50,8 @@ class OrderUpdate(BaseModel):
 class Order(OrderBase):
     id: int
     status: str
+    total_amount: Optional[float] = None
+    item_count: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     items: List[OrderItem] = []
@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
-import shutil
 from datetime import datetime, timezone
-from ..utils.pdf_generator import generate_bill_pdf, generate_multi_order_bill_pdf
+from ..utils.pdf_generator import bill_data, bill_renderer
+from ..utils.fast_json import model_response
 from pydantic import BaseModel
 
 from ..database import get_db, Order, Dish, OrderItem, Person, Settings
 from ..models.order import Order as OrderModel
 from ..models.dish import Dish as DishModel, DishCreate, DishUpdate
+from ..services.orders import (
+    query_orders,
+    attach_person_details,
+    get_order_with_details,
+    get_orders_with_details,
+    paginate_orders,
+    refresh_order_totals,
+)
+from ..services.order_events import broker
+from ..services.order_stats import order_status_counter
+from ..services.bill_cache import bill_cache, bill_cache_key, bill_file_response
+from ..services.bill_export import stream_bills_zip
+from ..services import sales_rollup
+from ..services.images import save_upload, process_dish_image, DISH_IMAGE_DIR, DISH_IMAGE_URL
 
 router = APIRouter(
     prefix="/admin",
@@ -19,34 +33,61 @@ router = APIRouter(
 )
 
 
-# Get all orders with customer information
+# Get orders with customer information, newest first
+# Pass limit to page through the results; the cursor for the next page is
+# returned in the X-Next-Cursor header
 @router.get("/orders", response_model=List[OrderModel])
-def get_all_orders(status: str = None, db: Session = Depends(get_db)):
-    query = db.query(Order)
+def get_all_orders(
+    status: str = None,
+    table_number: Optional[int] = None,
+    person_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    query = query_orders(db)
 
     if status:
         query = query.filter(Order.status == status)
 
-    # Order by most recent first
-    orders = query.order_by(Order.created_at.desc()).all()
-
-    # Load person information for each order
-    for order in orders:
-        if order.person_id:
-            person = db.query(Person).filter(Person.id == order.person_id).first()
-            if person:
-                # Add person information to the order
-                order.person_name = person.username
-                order.visit_count = person.visit_count
-
-        # Load dish information for each order item
-        for item in order.items:
-            if not hasattr(item, "dish") or item.dish is None:
-                dish = db.query(Dish).filter(Dish.id == item.dish_id).first()
-                if dish:
-                    item.dish = dish
-
-    return orders
+    if table_number is not None:
+        query = query.filter(Order.table_number == table_number)
+
+    if person_id is not None:
+        query = query.filter(Order.person_id == person_id)
+
+    if start_date:
+        try:
+            start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid start_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+        query = query.filter(Order.created_at >= start_datetime)
+
+    if end_date:
+        try:
+            end_datetime = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid end_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+        query = query.filter(Order.created_at <= end_datetime)
+
+    headers = {}
+    if limit is None:
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor requires limit")
+        # Order by most recent first
+        orders = query.order_by(Order.created_at.desc(), Order.id.desc()).all()
+    else:
+        try:
+            orders, next_cursor = paginate_orders(query, limit, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+
+    # Expose person information on each order
+    return model_response(List[OrderModel], attach_person_details(orders), headers=headers)
 
 
 # Get all dishes
@@ -65,7 +106,7 @@ def get_all_dishes(
         query = query.filter(Dish.is_special == is_special)
 
     dishes = query.all()
-    return dishes
+    return model_response(List[DishModel], dishes)
 
 
 # Get offer dishes
@@ -114,6 +155,7 @@ def create_category(category_name: str = Form(...), db: Session = Depends(get_db
 # Create new dish
 @router.post("/api/dishes", response_model=DishModel)
 async def create_dish(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     description: Optional[str] = Form(None),
     category: str = Form(...),
@@ -141,25 +183,21 @@ async def create_dish(
         is_special=is_special,
     )
 
+    # Save the upload off the event loop before creating the dish, so a
+    # rejected image doesn't leave a dish behind
+    source_path = None
+    if image:
+        source_path = await save_upload(image, DISH_IMAGE_DIR, "dish_")
+        db_dish.image_path = f"{DISH_IMAGE_URL}/{os.path.basename(source_path)}"
+
     # Save dish to database
     db.add(db_dish)
     db.commit()
     db.refresh(db_dish)
 
-    # Handle image upload if provided
-    if image:
-        # Create directory if it doesn't exist
-        os.makedirs("app/static/images/dishes", exist_ok=True)
-
-        # Save image
-        image_path = f"app/static/images/dishes/{db_dish.id}_{image.filename}"
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        # Update dish with image path
-        db_dish.image_path = f"/static/images/dishes/{db_dish.id}_{image.filename}"
-        db.commit()
-        db.refresh(db_dish)
+    # Variants are built after the response
+    if source_path:
+        background_tasks.add_task(process_dish_image, db_dish.id, db_dish.image_path, source_path)
 
     return db_dish
 
@@ -168,6 +206,7 @@ async def create_dish(
 @router.put("/api/dishes/{dish_id}", response_model=DishModel)
 async def update_dish(
     dish_id: int,
+    background_tasks: BackgroundTasks,
     name: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
     category: Optional[str] = Form(None),
@@ -207,16 +246,15 @@ async def update_dish(
 
     # Handle image upload if provided
     if image:
-        # Create directory if it doesn't exist
-        os.makedirs("app/static/images/dishes", exist_ok=True)
-
-        # Save image
-        image_path = f"app/static/images/dishes/{db_dish.id}_{image.filename}"
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        # Save image off the event loop; variants are built after the response
+        source_path = await save_upload(image, DISH_IMAGE_DIR, "dish_")
 
-        # Update dish with image path
-        db_dish.image_path = f"/static/images/dishes/{db_dish.id}_{image.filename}"
+        # Update dish with image path; the old variants no longer match it
+        db_dish.image_path = f"{DISH_IMAGE_URL}/{os.path.basename(source_path)}"
+        db_dish.thumbnail_path = None
+        db_dish.image_webp_path = None
+        db_dish.image_avif_path = None
+        background_tasks.add_task(process_dish_image, db_dish.id, db_dish.image_path, source_path)
 
     # Update timestamp
     db_dish.updated_at = datetime.now(timezone.utc)
@@ -243,61 +281,46 @@ def delete_dish(dish_id: int, db: Session = Depends(get_db)):
 
 # Get order statistics
 @router.get("/stats/orders")
-def get_order_stats(db: Session = Depends(get_db)):
-    total_orders = db.query(Order).count()
-    pending_orders = db.query(Order).filter(Order.status == "pending").count()
-    completed_orders = db.query(Order).filter(Order.status == "completed").count()
-    payment_requested = (
-        db.query(Order).filter(Order.status == "payment_requested").count()
-    )
-    paid_orders = db.query(Order).filter(Order.status == "paid").count()
+def get_order_stats():
+    # Live in-memory counts; no query unless they are due for a recount
+    counts = order_status_counter.counts()
 
     return {
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "completed_orders": completed_orders,
-        "payment_requested": payment_requested,
-        "paid_orders": paid_orders,
+        "total_orders": sum(counts.values()),
+        "pending_orders": counts.get("pending", 0),
+        "completed_orders": counts.get("completed", 0),
+        "payment_requested": counts.get("payment_requested", 0),
+        "paid_orders": counts.get("paid", 0),
     }
 
 
 # Mark order as paid
 @router.put("/orders/{order_id}/paid")
 def mark_order_paid(order_id: int, db: Session = Depends(get_db)):
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+    db_order = get_order_with_details(db, order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # Allow marking as paid from any status
-    db_order.status = "paid"
+    # Allow marking as paid from any status; the sale is counted in the
+    # daily rollup once
+    sales_rollup.set_order_status(db, db_order, "paid")
     db_order.updated_at = datetime.now(timezone.utc)
 
     db.commit()
 
+    broker.publish("order_paid", db_order.id, db_order.status, table_number=db_order.table_number)
+
     return {"message": "Order marked as paid"}
 
 
 # Generate bill PDF for a single order
 @router.get("/orders/{order_id}/bill")
-def generate_bill(order_id: int, db: Session = Depends(get_db)):
-    # Get order with all details
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+def generate_bill(request: Request, order_id: int, db: Session = Depends(get_db)):
+    # Get order with person, items and dishes
+    db_order = get_order_with_details(db, order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # Load person information if available
-    if db_order.person_id:
-        person = db.query(Person).filter(Person.id == db_order.person_id).first()
-        if person:
-            db_order.person_name = person.username
-
-    # Load dish information for each order item
-    for item in db_order.items:
-        if not hasattr(item, "dish") or item.dish is None:
-            dish = db.query(Dish).filter(Dish.id == item.dish_id).first()
-            if dish:
-                item.dish = dish
-
     # Get hotel settings
     settings = db.query(Settings).first()
     if not settings:
@@ -312,46 +335,58 @@ def generate_bill(order_id: int, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(settings)
 
-    # Generate PDF
-    pdf_buffer = generate_bill_pdf(db_order, settings)
+    # Generate PDF, or reuse the cached one; the cache key changes whenever
+    # the order or the settings do
+    data = bill_data([db_order], settings)
+    key = bill_cache_key(data, settings.updated_at)
+    f = bill_cache.get(key, lambda: bill_renderer.render(data))
 
     # Return PDF as a downloadable file
     filename = f"bill_order_{order_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
 
+    return bill_file_response(request, f, key, filename)
+
+
+# Export the bills of all orders in a date range as a ZIP archive
+# The archive is streamed while the bills render, so large ranges start
+# downloading immediately and don't build up in memory
+@router.get("/orders/bills/export")
+def export_bills(
+    start_date: str,
+    end_date: str,
+    status: Optional[str] = "paid",
+):
+    try:
+        start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid start_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+    try:
+        end_datetime = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid end_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+
+    filename = f"bills_{start_datetime.strftime('%Y%m%d')}_{end_datetime.strftime('%Y%m%d')}.zip"
+
     return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
+        stream_bills_zip(status or None, start_datetime, end_datetime),
+        media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 # Generate bill PDF for multiple orders
 @router.post("/orders/multi-bill")
-def generate_multi_bill(order_ids: List[int], db: Session = Depends(get_db)):
+def generate_multi_bill(request: Request, order_ids: List[int], db: Session = Depends(get_db)):
     if not order_ids:
         raise HTTPException(status_code=400, detail="No order IDs provided")
 
+    # Get all orders with details in one batch, keeping the requested order
+    orders_by_id = get_orders_with_details(db, order_ids)
     orders = []
-
-    # Get all orders with details
     for order_id in order_ids:
-        db_order = db.query(Order).filter(Order.id == order_id).first()
+        db_order = orders_by_id.get(order_id)
         if db_order is None:
             raise HTTPException(status_code=404, detail=f"Order {order_id} not found")
-
-        # Load person information if available
-        if db_order.person_id:
-            person = db.query(Person).filter(Person.id == db_order.person_id).first()
-            if person:
-                db_order.person_name = person.username
-
-        # Load dish information for each order item
-        for item in db_order.items:
-            if not hasattr(item, "dish") or item.dish is None:
-                dish = db.query(Dish).filter(Dish.id == item.dish_id).first()
-                if dish:
-                    item.dish = dish
-
         orders.append(db_order)
 
     # Get hotel settings
@@ -368,18 +403,16 @@ def generate_multi_bill(order_ids: List[int], db: Session = Depends(get_db)):
         db.commit()
         db.refresh(settings)
 
-    # Generate PDF for multiple orders
-    pdf_buffer = generate_multi_order_bill_pdf(orders, settings)
+    # Generate PDF for multiple orders, or reuse the cached one
+    data = bill_data(orders, settings)
+    key = bill_cache_key(data, settings.updated_at)
+    f = bill_cache.get(key, lambda: bill_renderer.render(data))
 
     # Create a filename with all order IDs
     order_ids_str = "-".join([str(order_id) for order_id in order_ids])
     filename = f"bill_orders_{order_ids_str}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
 
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return bill_file_response(request, f, key, filename)
 
 
 # Merge two orders
@@ -403,14 +436,25 @@ def merge_orders(source_order_id: int, target_order_id: int, db: Session = Depen
     if target_order.status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Target order must be completed or paid, current status: {target_order.status}")
 
-    # Move all items from source order to target order
-    for item in source_order.items:
-        # Update the order_id to point to the target order
-        item.order_id = target_order.id
+    # Take paid orders out of the sales rollup while their items change
+    if source_order.status == "paid":
+        sales_rollup.apply_order(db, source_order, sign=-1)
+    if target_order.status == "paid":
+        sales_rollup.apply_order(db, target_order, sign=-1)
 
-    # Update the target order's updated_at timestamp
+    # Move all items from source order to target order. Moving them through
+    # the relationship also removes them from the source's collection, so
+    # deleting the source below does not detach them again.
+    for item in list(source_order.items):
+        target_order.items.append(item)
+
+    # Update the target order's stored totals and updated_at timestamp
+    refresh_order_totals(db, target_order)
     target_order.updated_at = datetime.now(timezone.utc)
 
+    if target_order.status == "paid":
+        sales_rollup.apply_order(db, target_order)
+
     # Delete the source order (but keep its items which now belong to the target order)
     db.delete(source_order)
 
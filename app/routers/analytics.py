@@ -5,11 +5,13 @@ from typing import List, Dict, Any
 from datetime import datetime, timedelta, timezone
 import calendar
 
-from ..database import get_db, Dish, Order, OrderItem, Person, Table, Feedback
+from ..database import get_read_db, Dish, Order, OrderItem, Person, Table, Feedback
 from ..models.dish import Dish as DishModel
 from ..models.order import Order as OrderModel
 from ..models.user import Person as PersonModel
 from ..models.feedback import Feedback as FeedbackModel
+from ..services import sales_rollup
+from ..services.analytics_cache import analytics_cache, cached
 
 router = APIRouter(
     prefix="/analytics",
@@ -20,10 +22,11 @@ router = APIRouter(
 
 # Get overall dashboard statistics
 @router.get("/dashboard")
+@cached("dashboard", tables=("orders", "persons", "dishes"))
 def get_dashboard_stats(
     start_date: str = None,
     end_date: str = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Parse date strings to datetime objects if provided
     start_datetime = None
@@ -51,25 +54,9 @@ def get_dashboard_stats(
     if end_datetime:
         orders_query = orders_query.filter(Order.created_at <= end_datetime)
 
-    # Total sales
-    total_sales_query = (
-        db.query(
-            func.sum(Dish.price * OrderItem.quantity).label("total_sales")
-        )
-        .join(OrderItem, Dish.id == OrderItem.dish_id)
-        .join(Order, OrderItem.order_id == Order.id)
-        .filter(Order.status == "paid")
-    )
-
-    # Apply date filters to sales query
-    if start_datetime:
-        total_sales_query = total_sales_query.filter(Order.created_at >= start_datetime)
-
-    if end_datetime:
-        total_sales_query = total_sales_query.filter(Order.created_at <= end_datetime)
-
-    total_sales_result = total_sales_query.first()
-    total_sales = total_sales_result.total_sales if total_sales_result.total_sales else 0
+    # Total sales and paid order count, from the daily rollup where it covers
+    # the range
+    paid_orders, total_sales = sales_rollup.paid_sales_summary(db, start_datetime, end_datetime)
 
     # Total customers (only count those who placed orders in the date range)
     if start_datetime or end_datetime:
@@ -86,27 +73,7 @@ def get_dashboard_stats(
     total_dishes = db.query(Dish).count()
 
     # Average order value
-    avg_order_value_query = (
-        db.query(
-            func.avg(
-                db.query(func.sum(Dish.price * OrderItem.quantity))
-                .join(OrderItem, Dish.id == OrderItem.dish_id)
-                .filter(OrderItem.order_id == Order.id)
-                .scalar_subquery()
-            ).label("avg_order_value")
-        )
-        .filter(Order.status == "paid")
-    )
-
-    # Apply date filters to avg order value query
-    if start_datetime:
-        avg_order_value_query = avg_order_value_query.filter(Order.created_at >= start_datetime)
-
-    if end_datetime:
-        avg_order_value_query = avg_order_value_query.filter(Order.created_at <= end_datetime)
-
-    avg_order_value_result = avg_order_value_query.first()
-    avg_order_value = avg_order_value_result.avg_order_value if avg_order_value_result.avg_order_value else 0
+    avg_order_value = total_sales / paid_orders if paid_orders else 0
 
     # Return all stats
     return {
@@ -124,7 +91,8 @@ def get_dashboard_stats(
 
 # Get top customers by order count
 @router.get("/top-customers")
-def get_top_customers(limit: int = 10, db: Session = Depends(get_db)):
+@cached("top-customers", tables=("orders", "persons"))
+def get_top_customers(limit: int = 10, db: Session = Depends(get_read_db)):
     # Get customers with most orders
     top_customers_by_orders = (
         db.query(
@@ -133,12 +101,7 @@ def get_top_customers(limit: int = 10, db: Session = Depends(get_db)):
             Person.visit_count,
             Person.last_visit,
             func.count(Order.id).label("order_count"),
-            func.sum(
-                db.query(func.sum(Dish.price * OrderItem.quantity))
-                .join(OrderItem, Dish.id == OrderItem.dish_id)
-                .filter(OrderItem.order_id == Order.id)
-                .scalar_subquery()
-            ).label("total_spent"),
+            func.sum(Order.total_amount).label("total_spent"),
         )
         .join(Order, Person.id == Order.person_id)
         .group_by(Person.id)
@@ -165,7 +128,8 @@ def get_top_customers(limit: int = 10, db: Session = Depends(get_db)):
 
 # Get top selling dishes
 @router.get("/top-dishes")
-def get_top_dishes(limit: int = 10, db: Session = Depends(get_db)):
+@cached("top-dishes", tables=("orders", "order_items", "dishes"))
+def get_top_dishes(limit: int = 10, db: Session = Depends(get_read_db)):
     # Get dishes with most orders
     top_dishes = (
         db.query(
@@ -174,7 +138,7 @@ def get_top_dishes(limit: int = 10, db: Session = Depends(get_db)):
             Dish.category,
             Dish.price,
             func.sum(OrderItem.quantity).label("total_ordered"),
-            func.sum(Dish.price * OrderItem.quantity).label("total_revenue"),
+            func.sum(OrderItem.unit_price * OrderItem.quantity).label("total_revenue"),
         )
         .join(OrderItem, Dish.id == OrderItem.dish_id)
         .join(Order, OrderItem.order_id == Order.id)
@@ -202,13 +166,14 @@ def get_top_dishes(limit: int = 10, db: Session = Depends(get_db)):
 
 # Get sales by category
 @router.get("/sales-by-category")
-def get_sales_by_category(db: Session = Depends(get_db)):
+@cached("sales-by-category", tables=("orders", "order_items", "dishes"))
+def get_sales_by_category(db: Session = Depends(get_read_db)):
     # Get sales by category
     sales_by_category = (
         db.query(
             Dish.category,
             func.sum(OrderItem.quantity).label("total_ordered"),
-            func.sum(Dish.price * OrderItem.quantity).label("total_revenue"),
+            func.sum(OrderItem.unit_price * OrderItem.quantity).label("total_revenue"),
         )
         .join(OrderItem, Dish.id == OrderItem.dish_id)
         .join(Order, OrderItem.order_id == Order.id)
@@ -232,30 +197,14 @@ def get_sales_by_category(db: Session = Depends(get_db)):
 
 # Get sales over time (daily for the last 30 days)
 @router.get("/sales-over-time")
-def get_sales_over_time(days: int = 30, db: Session = Depends(get_db)):
+@cached("sales-over-time", tables=("orders",))
+def get_sales_over_time(days: int = 30, db: Session = Depends(get_read_db)):
     # Calculate the date range
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=days)
 
-    # Get sales by day
-    sales_by_day = (
-        db.query(
-            func.date(Order.created_at).label("date"),
-            func.count(Order.id).label("order_count"),
-            func.sum(
-                db.query(func.sum(Dish.price * OrderItem.quantity))
-                .join(OrderItem, Dish.id == OrderItem.dish_id)
-                .filter(OrderItem.order_id == Order.id)
-                .scalar_subquery()
-            ).label("total_sales"),
-        )
-        .filter(Order.status == "paid")
-        .filter(Order.created_at >= start_date)
-        .filter(Order.created_at <= end_date)
-        .group_by(func.date(Order.created_at))
-        .order_by(func.date(Order.created_at))
-        .all()
-    )
+    # Get sales by day, from the daily rollup where it covers the range
+    sales_by_day = sales_rollup.paid_sales_by_day(db, start_date, end_date)
 
     # Create a dictionary with all dates in the range
     date_range = {}
@@ -266,11 +215,11 @@ def get_sales_over_time(days: int = 30, db: Session = Depends(get_db)):
         current_date += timedelta(days=1)
 
     # Fill in the actual data
-    for day in sales_by_day:
-        date_str = day.date.strftime("%Y-%m-%d") if isinstance(day.date, datetime) else day.date
+    for day, (order_count, total_sales) in sales_by_day.items():
+        date_str = day.strftime("%Y-%m-%d")
         date_range[date_str] = {
-            "order_count": day.order_count,
-            "total_sales": round(day.total_sales, 2) if day.total_sales else 0,
+            "order_count": order_count,
+            "total_sales": round(total_sales, 2) if total_sales else 0,
         }
 
     # Convert to list format
@@ -287,7 +236,8 @@ def get_sales_over_time(days: int = 30, db: Session = Depends(get_db)):
 
 # Get chef performance metrics
 @router.get("/chef-performance")
-def get_chef_performance(days: int = 30, db: Session = Depends(get_db)):
+@cached("chef-performance", tables=("orders",))
+def get_chef_performance(days: int = 30, db: Session = Depends(get_read_db)):
     # Calculate the date range
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=days)
@@ -305,13 +255,7 @@ def get_chef_performance(days: int = 30, db: Session = Depends(get_db)):
 
     # Calculate average items per order
     avg_items_per_order_query = (
-        db.query(
-            func.avg(
-                db.query(func.count(OrderItem.id))
-                .filter(OrderItem.order_id == Order.id)
-                .scalar_subquery()
-            ).label("avg_items")
-        )
+        db.query(func.avg(Order.item_count).label("avg_items"))
         .filter(Order.status.in_(["completed", "paid"]))
         .filter(Order.created_at >= start_date)
         .filter(Order.created_at <= end_date)
@@ -320,15 +264,18 @@ def get_chef_performance(days: int = 30, db: Session = Depends(get_db)):
 
     avg_items_per_order = avg_items_per_order_query.avg_items if avg_items_per_order_query.avg_items else 0
 
-    # Get busiest day of week
+    # Get busiest day of week. extract('dow') is rendered per dialect
+    # (strftime('%w') on SQLite, EXTRACT(DOW) on PostgreSQL); both number the
+    # days from 0 = Sunday.
+    day_of_week = extract('dow', Order.created_at).label("day_of_week")
     busiest_day_query = (
         db.query(
-            extract('dow', Order.created_at).label("day_of_week"),
+            day_of_week,
             func.count(Order.id).label("order_count")
         )
         .filter(Order.created_at >= start_date)
         .filter(Order.created_at <= end_date)
-        .group_by(extract('dow', Order.created_at))
+        .group_by(day_of_week)
         .order_by(desc("order_count"))
         .first()
     )
@@ -336,9 +283,10 @@ def get_chef_performance(days: int = 30, db: Session = Depends(get_db)):
     busiest_day = None
     if busiest_day_query:
         # Convert day number to day name (0 = Sunday, 1 = Monday, etc.)
+        # calendar.day_name starts at Monday, so shift by one
         day_names = list(calendar.day_name)
         day_number = int(busiest_day_query.day_of_week)
-        busiest_day = day_names[day_number]
+        busiest_day = day_names[(day_number - 1) % 7]
 
     return {
         "total_completed_orders": total_completed,
@@ -349,7 +297,8 @@ def get_chef_performance(days: int = 30, db: Session = Depends(get_db)):
 
 # Get table utilization statistics
 @router.get("/table-utilization")
-def get_table_utilization(db: Session = Depends(get_db)):
+@cached("table-utilization", tables=("orders", "tables"))
+def get_table_utilization(db: Session = Depends(get_read_db)):
     # Get all tables
     tables = db.query(Table).all()
 
@@ -358,12 +307,7 @@ def get_table_utilization(db: Session = Depends(get_db)):
         db.query(
             Order.table_number,
             func.count(Order.id).label("order_count"),
-            func.sum(
-                db.query(func.sum(Dish.price * OrderItem.quantity))
-                .join(OrderItem, Dish.id == OrderItem.dish_id)
-                .filter(OrderItem.order_id == Order.id)
-                .scalar_subquery()
-            ).label("total_revenue"),
+            func.sum(Order.total_amount).label("total_revenue"),
         )
         .group_by(Order.table_number)
         .all()
@@ -396,10 +340,11 @@ def get_table_utilization(db: Session = Depends(get_db)):
 
 # Get customer visit frequency analysis
 @router.get("/customer-frequency")
+@cached("customer-frequency", tables=("orders", "persons"))
 def get_customer_frequency(
     start_date: str = None,
     end_date: str = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Parse date strings to datetime objects if provided
     start_datetime = None
@@ -472,10 +417,11 @@ def get_customer_frequency(
 
 # Get feedback analysis
 @router.get("/feedback-analysis")
+@cached("feedback-analysis", tables=("feedback", "persons"))
 def get_feedback_analysis(
     start_date: str = None,
     end_date: str = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Parse date strings to datetime objects if provided
     start_datetime = None
@@ -561,3 +507,9 @@ def get_feedback_analysis(
             "end_date": end_date
         }
     }
+
+
+# Get analytics cache hit/miss counters
+@router.get("/cache-stats")
+def get_cache_stats():
+    return analytics_cache.stats()
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
+import asyncio
 
-from ..database import get_db, Dish, Order, OrderItem
+from ..database import get_db, SessionLocal, Dish, Order, OrderItem
 from ..models.dish import Dish as DishModel
 from ..models.order import Order as OrderModel
+from ..services.orders import query_orders
+from ..services.order_events import broker, format_sse
+from ..services.order_stats import order_status_counter
+from ..services import sales_rollup
+from ..utils.fast_json import model_response
 
 router = APIRouter(
     prefix="/chef",
@@ -15,15 +23,68 @@ router = APIRouter(
 
 # Add an API endpoint to get completed orders count
 @router.get("/api/completed-orders-count")
-def get_completed_orders_count(db: Session = Depends(get_db)):
-    completed_orders = db.query(Order).filter(Order.status == "completed").count()
-    return {"count": completed_orders}
+def get_completed_orders_count():
+    return {"count": order_status_counter.counts().get("completed", 0)}
 
 # Get pending orders
 @router.get("/orders/pending", response_model=List[OrderModel])
 def get_pending_orders(db: Session = Depends(get_db)):
-    orders = db.query(Order).filter(Order.status == "pending").all()
-    return orders
+    orders = query_orders(db).filter(Order.status == "pending").all()
+    return model_response(List[OrderModel], orders)
+
+# Load the pending orders as JSON-ready dicts for a feed snapshot
+def _pending_orders_snapshot():
+    db = SessionLocal()
+    try:
+        orders = query_orders(db).filter(Order.status == "pending").all()
+        return [OrderModel.model_validate(order).model_dump(mode="json") for order in orders]
+    finally:
+        db.close()
+
+
+# Live feed of order changes for kitchen screens (Server-Sent Events)
+# A new client first receives a "snapshot" event with all pending orders and
+# then one event per order change. A reconnecting client sends the id of the
+# last event it saw (Last-Event-ID header, or the last_event_id query
+# parameter) and only receives the events it missed.
+@router.get("/orders/stream")
+async def stream_orders(
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    subscription, backlog, sequence = broker.subscribe(last_event_id_header or last_event_id)
+    _, queue = subscription
+
+    async def event_stream():
+        try:
+            if backlog is None:
+                orders = await run_in_threadpool(_pending_orders_snapshot)
+                yield format_sse(
+                    "snapshot",
+                    {"seq": sequence, "orders": orders},
+                    broker.event_id(sequence),
+                )
+            else:
+                for event in backlog:
+                    yield format_sse(event["type"], event, broker.event_id(event["seq"]))
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield format_sse(event["type"], event, broker.event_id(event["seq"]))
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # Mark order as completed
 @router.put("/orders/{order_id}/complete")
@@ -32,9 +93,12 @@ def complete_order(order_id: int, db: Session = Depends(get_db)):
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    db_order.status = "completed"
+    # A paid order that is completed again is taken out of the sales rollup
+    sales_rollup.set_order_status(db, db_order, "completed")
     db_order.updated_at = datetime.utcnow()
 
     db.commit()
 
+    broker.publish("order_completed", db_order.id, db_order.status, table_number=db_order.table_number)
+
     return {"message": "Order marked as completed"}
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
+import json
 import uuid
 from datetime import datetime, timezone, timedelta
 
-from ..database import get_db, Dish, Order, OrderItem, Person
+from ..database import get_db, get_async_db, async_write_lock, Dish, Order, OrderItem, Person, Table
 from ..models.dish import Dish as DishModel
 from ..models.order import OrderCreate, Order as OrderModel
 from ..models.user import (
@@ -16,6 +19,11 @@ from ..models.user import (
     UsernameRequest
 )
 from ..services import firebase_auth
+from ..services.orders import select_orders, get_order_with_details, get_order_with_details_async, attach_person_details
+from ..services.order_events import broker
+from ..services.menu_cache import cached_json_response, cached_json_response_async
+from ..services import sales_rollup
+from ..utils.fast_json import dump_json, model_response
 
 router = APIRouter(
     prefix="/customer",
@@ -24,35 +32,50 @@ router = APIRouter(
 )
 
 
+# Serialise dishes straight to JSON bytes for the menu cache
+def _dump_dishes(dishes) -> bytes:
+    return dump_json(List[DishModel], dishes)
+
+
 # Get all dishes for menu
 @router.get("/api/menu", response_model=List[DishModel])
-def get_menu(category: str = None, db: Session = Depends(get_db)):
-    if category:
-        dishes = db.query(Dish).filter(Dish.category == category).all()
-    else:
-        dishes = db.query(Dish).all()
-    return dishes
+async def get_menu(request: Request, category: str = None, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        query = select(Dish)
+        if category:
+            query = query.where(Dish.category == category)
+        dishes = (await db.execute(query)).scalars().all()
+        return _dump_dishes(dishes)
+
+    return await cached_json_response_async(request, f"menu:{category or ''}", build)
 
 
 # Get offer dishes
 @router.get("/api/offers", response_model=List[DishModel])
-def get_offers(db: Session = Depends(get_db)):
-    dishes = db.query(Dish).filter(Dish.is_offer == 1).all()
-    return dishes
+def get_offers(request: Request, db: Session = Depends(get_db)):
+    def build():
+        return _dump_dishes(db.query(Dish).filter(Dish.is_offer == 1).all())
+
+    return cached_json_response(request, "offers", build)
 
 
 # Get special dishes
 @router.get("/api/specials", response_model=List[DishModel])
-def get_specials(db: Session = Depends(get_db)):
-    dishes = db.query(Dish).filter(Dish.is_special == 1).all()
-    return dishes
+def get_specials(request: Request, db: Session = Depends(get_db)):
+    def build():
+        return _dump_dishes(db.query(Dish).filter(Dish.is_special == 1).all())
+
+    return cached_json_response(request, "specials", build)
 
 
 # Get all dish categories
 @router.get("/api/categories")
-def get_categories(db: Session = Depends(get_db)):
-    categories = db.query(Dish.category).distinct().all()
-    return [category[0] for category in categories]
+def get_categories(request: Request, db: Session = Depends(get_db)):
+    def build():
+        categories = db.query(Dish.category).distinct().all()
+        return json.dumps([category[0] for category in categories]).encode()
+
+    return cached_json_response(request, "categories", build)
 
 
 # Register a new user or update existing user
@@ -116,129 +139,142 @@ def login_user(user_data: PersonLogin, db: Session = Depends(get_db)):
 
 
 # Create new order
+# The person upsert, order, table update and items are written in a single
+# transaction with one commit
 @router.post("/api/orders", response_model=OrderModel)
-def create_order(
-    order: OrderCreate, person_id: int = None, db: Session = Depends(get_db)
+async def create_order(
+    order: OrderCreate, person_id: int = None, db: AsyncSession = Depends(get_async_db)
 ):
-    # If person_id is not provided but we have a username/password, try to find or create the user
-    if not person_id and hasattr(order, "username") and hasattr(order, "password"):
-        # Check if user exists
-        db_user = db.query(Person).filter(Person.username == order.username).first()
-
-        if db_user:
-            # Update existing user's visit count
-            db_user.visit_count += 1
-            db_user.last_visit = datetime.now(timezone.utc)
-            db.commit()
+    # All writes happen under the write lock, from the first query to commit
+    async with async_write_lock:
+        now = datetime.now(timezone.utc)
+
+        # If person_id is not provided but we have a username/password, try to find or create the user
+        if not person_id and hasattr(order, "username") and hasattr(order, "password"):
+            # Check if user exists
+            result = await db.execute(select(Person).where(Person.username == order.username))
+            db_user = result.scalars().first()
+
+            if db_user:
+                # Update existing user's visit count
+                db_user.visit_count += 1
+                db_user.last_visit = now
+            else:
+                # Create new user
+                db_user = Person(
+                    username=order.username,
+                    password=order.password,
+                    visit_count=1,
+                    last_visit=now,
+                )
+                db.add(db_user)
+                await db.flush()
             person_id = db_user.id
-        else:
-            # Create new user
-            db_user = Person(
-                username=order.username,
-                password=order.password,
-                visit_count=1,
-                last_visit=datetime.now(timezone.utc),
-            )
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
-            person_id = db_user.id
-
-    # Create order
-    db_order = Order(
-        table_number=order.table_number,
-        unique_id=order.unique_id,
-        person_id=person_id,  # Link order to person if provided
-        status="pending",
-    )
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
 
-    # Mark the table as occupied
-    from ..database import Table
-
-    db_table = db.query(Table).filter(Table.table_number == order.table_number).first()
-    if db_table:
-        db_table.is_occupied = True
-        db_table.current_order_id = db_order.id
-        db.commit()
-
-    # Create order items
-    for item in order.items:
-        # Get the dish to include its information
-        dish = db.query(Dish).filter(Dish.id == item.dish_id).first()
-        if not dish:
-            continue  # Skip if dish doesn't exist
-
-        db_item = OrderItem(
-            order_id=db_order.id,
-            dish_id=item.dish_id,
-            quantity=item.quantity,
-            remarks=item.remarks,
+        # Validate all dish IDs and fetch their current prices with one query;
+        # items for unknown dishes are skipped
+        dish_ids = {item.dish_id for item in order.items}
+        dish_prices = {}
+        if dish_ids:
+            result = await db.execute(select(Dish.id, Dish.price).where(Dish.id.in_(dish_ids)))
+            dish_prices = {row.id: row.price for row in result}
+
+        # Snapshot each item's price so later menu changes don't alter the order
+        item_rows = [
+            {
+                "dish_id": item.dish_id,
+                "quantity": item.quantity,
+                "unit_price": dish_prices[item.dish_id],
+                "remarks": item.remarks,
+            }
+            for item in order.items
+            if item.dish_id in dish_prices
+        ]
+
+        # Create order
+        db_order = Order(
+            table_number=order.table_number,
+            unique_id=order.unique_id,
+            person_id=person_id,  # Link order to person if provided
+            status="pending",
+            total_amount=sum((row["unit_price"] or 0) * row["quantity"] for row in item_rows),
+            item_count=len(item_rows),
+        )
+        db.add(db_order)
+        await db.flush()
+        order_id = db_order.id
+
+        # Mark the table as occupied
+        await db.execute(
+            update(Table)
+            .where(Table.table_number == order.table_number)
+            .values(is_occupied=True, current_order_id=order_id)
         )
-        db.add(db_item)
 
-    db.commit()
-    db.refresh(db_order)
+        # Create order items with a single bulk insert
+        if item_rows:
+            for row in item_rows:
+                row["order_id"] = order_id
+            await db.execute(insert(OrderItem), item_rows)
+
+        await db.commit()
+
+    # Reload the order with its items and dishes for the response; the
+    # session is dropped first so the new items are loaded, not the cached
+    # order without them
+    db.expunge_all()
+    db_order = await get_order_with_details_async(db, order_id)
+
+    # Push the new order to the kitchen feed
+    broker.publish(
+        "order_created",
+        db_order.id,
+        db_order.status,
+        table_number=db_order.table_number,
+        order=OrderModel.model_validate(db_order).model_dump(mode="json"),
+    )
 
     return db_order
 
 
 # Get order status
 @router.get("/api/orders/{order_id}", response_model=OrderModel)
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    # Use joinedload to load the dish relationship for each order item
-    order = db.query(Order).filter(Order.id == order_id).first()
+async def get_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Load the order together with its items and their dishes
+    order = await get_order_with_details_async(db, order_id)
     if order is None:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # Explicitly load dish information for each order item
-    for item in order.items:
-        if not hasattr(item, "dish") or item.dish is None:
-            dish = db.query(Dish).filter(Dish.id == item.dish_id).first()
-            if dish:
-                item.dish = dish
-
     return order
 
 
 # Get orders by person_id
 @router.get("/api/person/{person_id}/orders", response_model=List[OrderModel])
-def get_person_orders(person_id: int, db: Session = Depends(get_db)):
-    # Get all orders for a specific person
-    orders = (
-        db.query(Order)
-        .filter(Order.person_id == person_id)
+async def get_person_orders(person_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Get all orders for a specific person with items and dishes eager-loaded
+    result = await db.execute(
+        select_orders()
+        .where(Order.person_id == person_id)
         .order_by(Order.created_at.desc())
-        .all()
     )
 
-    # Explicitly load dish information for each order item
-    for order in orders:
-        for item in order.items:
-            if not hasattr(item, "dish") or item.dish is None:
-                dish = db.query(Dish).filter(Dish.id == item.dish_id).first()
-                if dish:
-                    item.dish = dish
-
-    return orders
+    orders = attach_person_details(result.scalars().all())
+    return model_response(List[OrderModel], orders)
 
 
 # Request payment for order
 @router.put("/api/orders/{order_id}/payment")
 def request_payment(order_id: int, db: Session = Depends(get_db)):
-    db_order = db.query(Order).filter(Order.id == order_id).first()
+    db_order = get_order_with_details(db, order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # Update order status to paid directly
-    db_order.status = "paid"
+    # Update order status to paid directly; the sale is counted in the
+    # daily rollup once
+    sales_rollup.set_order_status(db, db_order, "paid")
     db_order.updated_at = datetime.now(timezone.utc)
 
     # Mark the table as free
-    from ..database import Table
-
     db_table = (
         db.query(Table).filter(Table.table_number == db_order.table_number).first()
     )
@@ -249,6 +285,8 @@ def request_payment(order_id: int, db: Session = Depends(get_db)):
 
     db.commit()
 
+    broker.publish("order_paid", db_order.id, db_order.status, table_number=db_order.table_number)
+
     return {"message": "Payment completed successfully"}
 
 
@@ -269,6 +307,9 @@ def cancel_order(order_id: int, db: Session = Depends(get_db)):
     # Check if order was created within the last 60 seconds
     current_time = datetime.now(timezone.utc)
     order_time = db_order.created_at
+    if order_time.tzinfo is None:
+        # SQLite returns naive datetimes; they are stored in UTC
+        order_time = order_time.replace(tzinfo=timezone.utc)
     time_difference = current_time - order_time
 
     if time_difference > timedelta(seconds=60):
@@ -278,12 +319,10 @@ def cancel_order(order_id: int, db: Session = Depends(get_db)):
         )
 
     # Update order status to cancelled
-    db_order.status = "cancelled"
+    sales_rollup.set_order_status(db, db_order, "cancelled")
     db_order.updated_at = current_time
 
     # Mark the table as free if this was the current order
-    from ..database import Table
-
     db_table = db.query(Table).filter(Table.table_number == db_order.table_number).first()
     if db_table and db_table.current_order_id == db_order.id:
         db_table.is_occupied = False
@@ -292,6 +331,8 @@ def cancel_order(order_id: int, db: Session = Depends(get_db)):
 
     db.commit()
 
+    broker.publish("order_cancelled", db_order.id, db_order.status, table_number=db_order.table_number)
+
     return {"message": "Order cancelled successfully"}
 
 
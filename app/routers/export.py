@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime, timezone
+
+from ..services import data_export
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def _export_response(
+    name: str,
+    export_format: str,
+    since_id: Optional[int],
+    start_date: Optional[str],
+    end_date: Optional[str],
+):
+    media_type, extension = data_export.FORMATS[export_format]
+    if export_format != "csv" and not data_export.HAS_PYARROW:
+        raise HTTPException(
+            status_code=501,
+            detail=f"{export_format} export requires pyarrow (pip install pyarrow)",
+        )
+
+    start_datetime = None
+    if start_date:
+        try:
+            start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid start_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+
+    end_datetime = None
+    if end_date:
+        try:
+            end_datetime = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid end_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+
+    # Fix the last id before streaming; clients pass it back as since_id on
+    # the next sync to fetch only rows with a higher id (which can miss rows
+    # committed late, see export_upper_bound)
+    max_id = data_export.export_upper_bound(name, since_id)
+
+    filename = f"{name}_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}.{extension}"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if max_id is not None:
+        headers["X-Export-Last-Id"] = str(max_id)
+
+    return StreamingResponse(
+        data_export.stream_export(name, export_format, since_id, start_datetime, end_datetime, max_id),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+# Export all orders
+@router.get("/orders")
+def export_orders(
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$"),
+    since_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    return _export_response("orders", format, since_id, start_date, end_date)
+
+
+# Export order items with their dish name and category
+@router.get("/order-items")
+def export_order_items(
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$"),
+    since_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    return _export_response("order_items", format, since_id, start_date, end_date)
+
+
+# Export customers (without passwords)
+@router.get("/persons")
+def export_persons(
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$"),
+    since_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    return _export_response("persons", format, since_id, start_date, end_date)
+
+
+# Export feedback
+@router.get("/feedback")
+def export_feedback(
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$"),
+    since_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    return _export_response("feedback", format, since_id, start_date, end_date)
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 
 from ..database import get_db, Feedback as FeedbackModel, Order, Person
 from ..models.feedback import Feedback, FeedbackCreate
+from ..utils.fast_json import model_response
 
 router = APIRouter(
     prefix="/feedback",
@@ -44,7 +45,7 @@ def create_feedback(feedback: FeedbackCreate, db: Session = Depends(get_db)):
 # Get all feedback
 @router.get("/", response_model=List[Feedback])
 def get_all_feedback(db: Session = Depends(get_db)):
-    return db.query(FeedbackModel).all()
+    return model_response(List[Feedback], db.query(FeedbackModel).all())
 
 
 # Get feedback by order_id
@@ -59,4 +60,5 @@ def get_feedback_by_order(order_id: int, db: Session = Depends(get_db)):
 # Get feedback by person_id
 @router.get("/person/{person_id}", response_model=List[Feedback])
 def get_feedback_by_person(person_id: int, db: Session = Depends(get_db)):
-    return db.query(FeedbackModel).filter(FeedbackModel.person_id == person_id).all()
+    feedback = db.query(FeedbackModel).filter(FeedbackModel.person_id == person_id).all()
+    return model_response(List[Feedback], feedback)
@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import Optional
 import os
-import shutil
 from datetime import datetime, timezone
 
 from ..database import get_db, Settings
 from ..models.settings import Settings as SettingsModel, SettingsUpdate
+from ..services.images import save_upload
 
 router = APIRouter(
     prefix="/settings",
@@ -69,16 +69,13 @@ async def update_settings(
     
     # Handle logo upload if provided
     if logo:
-        # Create directory if it doesn't exist
-        os.makedirs("app/static/images/logo", exist_ok=True)
-        
-        # Save logo
-        logo_path = f"app/static/images/logo/hotel_logo_{logo.filename}"
-        with open(logo_path, "wb") as buffer:
-            shutil.copyfileobj(logo.file, buffer)
+        # Save logo off the event loop, with the same size cap as dish images.
+        # It is stored as uploaded (no variants), so any format the browser
+        # can show is accepted, including SVG and HEIC that Pillow can't read
+        logo_path = await save_upload(logo, "app/static/images/logo", "hotel_logo_", verify=False)
         
         # Update settings with logo path
-        settings.logo_path = f"/static/images/logo/hotel_logo_{logo.filename}"
+        settings.logo_path = f"/static/images/logo/{os.path.basename(logo_path)}"
     
     # Update timestamp
     settings.updated_at = datetime.now(timezone.utc)
@@ -0,0 +1,175 @@
+from typing import Optional
+import importlib.util
+import os
+
+# gunicorn (Unix only) supervises the workers when installed; otherwise
+# uvicorn's own process manager is used
+try:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+except ImportError:
+    BaseApplication = None
+    UvicornWorker = None
+
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
+# Worker processes. Only one is supported for now: the live order stream
+# (order_events) and the order status counts (order_stats) are kept in
+# process memory, and serve() refuses more until they are shared.
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+MAX_WEB_WORKERS = 1
+# "auto" picks uvloop and httptools when they are installed
+WEB_LOOP = os.getenv("WEB_LOOP", "auto")
+WEB_HTTP = os.getenv("WEB_HTTP", "auto")
+# Seconds an idle keep-alive connection stays open; set it above the idle
+# timeout of a load balancer in front of the app
+WEB_KEEPALIVE = int(os.getenv("WEB_KEEPALIVE", "5"))
+# Connections the kernel queues while every worker is busy
+WEB_BACKLOG = int(os.getenv("WEB_BACKLOG", "2048"))
+# Seconds in-flight requests get to finish after SIGTERM
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+# A worker that doesn't check in with gunicorn for this many seconds is restarted
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "60"))
+# Restart a worker after this many requests (0 = never), with up to 10% jitter
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+
+
+def event_loop() -> str:
+    if WEB_LOOP != "auto":
+        return WEB_LOOP
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    if WEB_HTTP != "auto":
+        return WEB_HTTP
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def _reset_connection_pools():
+    """
+    Drop the database connections a forked worker inherited from the master
+    without closing them, so the master's sockets are never shared
+    """
+    from .database import engine, read_engine, async_engine
+
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+if BaseApplication is not None:
+
+    class TabbleUvicornWorker(UvicornWorker):
+        """
+        Uvicorn worker using the configured event loop and HTTP parser, which
+        lets in-flight requests finish on SIGTERM before gunicorn's graceful
+        timeout kills it
+        """
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # uvicorn resolves "auto" itself
+            self.config.loop = WEB_LOOP
+            self.config.http = WEB_HTTP
+            self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 1)
+
+    class TabbleApplication(BaseApplication):
+        """
+        gunicorn with the app imported once in the master (preload) and
+        forked into the workers, which share its memory pages
+        """
+
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for name, value in self.options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            from .main import app
+            return app
+
+    def _post_fork(server, worker):
+        from .services.order_events import broker
+
+        _reset_connection_pools()
+        # A stream id copied from the master would be shared by every worker
+        # (and every restarted one), so a Last-Event-ID from one worker's
+        # stream would be accepted by another
+        broker.reset()
+
+
+def gunicorn_options(workers: int) -> dict:
+    return {
+        "bind": f"{WEB_HOST}:{WEB_PORT}",
+        "workers": workers,
+        "worker_class": "app.server.TabbleUvicornWorker",
+        "preload_app": True,
+        "keepalive": WEB_KEEPALIVE,
+        "backlog": WEB_BACKLOG,
+        "graceful_timeout": WEB_GRACEFUL_TIMEOUT,
+        "timeout": WEB_TIMEOUT,
+        "max_requests": WEB_MAX_REQUESTS,
+        "max_requests_jitter": WEB_MAX_REQUESTS // 10,
+        "post_fork": _post_fork,
+    }
+
+
+def serve(workers: Optional[int] = None):
+    """
+    Run the app in production mode: migrations once in this (master)
+    process, then the workers, without a reloader
+
+    SIGTERM stops accepting connections and gives in-flight requests
+    WEB_GRACEFUL_TIMEOUT seconds to finish.
+
+    Args:
+        workers: Worker processes (default WEB_WORKERS)
+
+    Raises:
+        SystemExit: If more than MAX_WEB_WORKERS workers are requested
+    """
+    from .migrations import upgrade
+
+    workers = workers or WEB_WORKERS
+    if workers > MAX_WEB_WORKERS:
+        # A second worker would split the chef streams and the status counts
+        # between processes, so fail before binding the port
+        raise SystemExit(
+            f"WEB_WORKERS={workers} is not supported: live order streams and "
+            f"order status counts are kept per process, so run at most "
+            f"{MAX_WEB_WORKERS} worker(s)"
+        )
+
+    # Bring the schema up to date before any worker imports the app; the
+    # workers' own check_schema() is then a single query
+    upgrade()
+
+    print(
+        f"Starting {workers} worker(s) on {WEB_HOST}:{WEB_PORT} "
+        f"(loop: {event_loop()}, http: {http_protocol()})"
+    )
+
+    if BaseApplication is not None:
+        TabbleApplication(gunicorn_options(workers)).run()
+        return
+
+    # Without gunicorn (e.g. on Windows) uvicorn spawns the workers. They
+    # each import the app, since spawned processes share no memory.
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:app",
+        host=WEB_HOST,
+        port=WEB_PORT,
+        workers=workers,
+        loop=event_loop(),
+        http=http_protocol(),
+        timeout_keep_alive=WEB_KEEPALIVE,
+        backlog=WEB_BACKLOG,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+        limit_max_requests=WEB_MAX_REQUESTS or None,
+    )
@@ -0,0 +1,208 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+import functools
+import os
+import threading
+import time
+
+# Parameters that identify an analytics result; anything else (the db
+# session) is ignored when building the cache key
+KEY_PARAMS = ("start_date", "end_date", "days", "limit")
+
+
+class _Flight:
+    """
+    A computation in progress that concurrent identical requests wait on
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class AnalyticsCache:
+    """
+    TTL + LRU memoisation for analytics results
+
+    Each entry is tagged with the tables it was computed from. Committing a
+    write to one of those tables drops the entries carrying that tag. While a
+    value is being computed, identical requests wait for it instead of running
+    the same queries again.
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._flights = {}
+        # Invalidation counters per table, plus one bumped by clear(). A
+        # result is only stored if none of the tables it read changed while
+        # it was computed.
+        self._tag_generations = {}
+        self._clear_generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.invalidations = 0
+
+    def _generations(self, tags: frozenset):
+        # Must be called with the lock held
+        return self._clear_generation, tuple(self._tag_generations.get(tag, 0) for tag in sorted(tags))
+
+    def get_or_compute(self, key, tags: Iterable[str], compute: Callable):
+        tags = frozenset(tags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.shared += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                leader = True
+            generations = self._generations(tags)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                # Don't store a result that raced with an invalidation of
+                # one of its tables
+                if flight.error is None and generations == self._generations(tags):
+                    self._entries[key] = (time.monotonic() + self.ttl, tags, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+
+        return flight.value
+
+    def invalidate(self, tags: Iterable[str]):
+        """
+        Drop every entry computed from any of the given tables
+        """
+        tags = set(tags)
+        if not tags:
+            return
+        with self._lock:
+            for tag in tags:
+                self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[1] & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._clear_generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+
+def _normalise(name, value):
+    if value is None:
+        return None
+    if name in ("start_date", "end_date") and isinstance(value, str):
+        # Equivalent spellings of the same instant share an entry
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.isoformat()
+    return value
+
+
+def cached(endpoint: str, tables: Iterable[str]):
+    """
+    Memoise a sync analytics endpoint
+
+    Args:
+        endpoint: Name used in the cache key
+        tables: Tables the result is computed from; writes to them invalidate it
+    """
+    tables = frozenset(tables)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (endpoint,) + tuple(
+                (name, _normalise(name, kwargs.get(name))) for name in KEY_PARAMS if name in kwargs
+            )
+            return analytics_cache.get_or_compute(key, tables, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+analytics_cache = AnalyticsCache(
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", "60")),
+    max_entries=int(os.getenv("ANALYTICS_CACHE_SIZE", "256")),
+)
+
+
+# Track which tables a session writes to and invalidate the matching
+# entries once the transaction commits
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session, flush_context):
+    written = session.info.setdefault("analytics_written_tables", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            written.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            written = orm_execute_state.session.info.setdefault("analytics_written_tables", set())
+            written.add(mapper.local_table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tables(session):
+    written = session.info.pop("analytics_written_tables", None)
+    if written:
+        analytics_cache.invalidate(written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_tables(session):
+    session.info.pop("analytics_written_tables", None)
@@ -0,0 +1,267 @@
+from fastapi import Request, Response
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+# On-disk store for rendered bills; entries beyond the size limit are
+# evicted least recently used first
+BILL_CACHE_DIR = os.getenv("BILL_CACHE_DIR", "bill_cache")
+BILL_CACHE_MAX_BYTES = int(os.getenv("BILL_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Bytes read per chunk when streaming a bill
+BILL_CHUNK_SIZE = 64 * 1024
+
+
+def bill_cache_key(data: dict, settings_version) -> str:
+    """
+    Hash everything that appears on a bill
+
+    Args:
+        data: Output of pdf_generator.bill_data (order ids, items, quantities,
+            prices, header fields); the print time is left out
+        settings_version: Settings.updated_at, so editing the settings
+            produces a new key even for fields not printed on the bill
+
+    Returns:
+        str: Hex digest naming the cached PDF
+    """
+    content = {key: value for key, value in data.items() if key != "printed_at"}
+    content["settings_version"] = str(settings_version)
+    raw = json.dumps(content, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class BillCache:
+    """
+    Content-addressed cache of rendered bill PDFs
+
+    A bill is stored under the hash of its contents, so a changed order or
+    settings row simply maps to a different file and stale entries age out
+    through eviction. Access order is kept in memory and mirrored to file
+    mtimes so it survives restarts.
+
+    Bills are handed out as files opened under the lock that evicts them and
+    read after it is released. A bill evicted while it is being sent stays
+    readable through the open file (on POSIX), and one already removed by
+    another process counts as a miss.
+
+    The index lives in each process, so processes sharing the directory
+    (e.g. a restarted server overlapping the old one) each enforce max_bytes
+    on their own view of it, and the directory can grow past
+    BILL_CACHE_MAX_BYTES until the next eviction in each of them.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: Optional[OrderedDict] = None  # key -> size, oldest first
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _load_index(self):
+        # Called with the lock held
+        if self._entries is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total = sum(self._entries.values())
+
+    def lookup(self, key: str) -> Optional[BinaryIO]:
+        """
+        Open a cached bill, marking it as recently used
+
+        Returns:
+            The open file, which the caller must close, or None on a miss
+        """
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # Removed by another process's eviction
+                self._total -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            now = time.time()
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return f
+
+    def store(self, key: str, body: bytes) -> BinaryIO:
+        """
+        Write a rendered bill and evict the least recently used bills while
+        the cache is over its size limit
+
+        Returns:
+            The stored bill opened for reading, which the caller must close
+        """
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+        # Write to a temporary name first so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(body)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if key in self._entries:
+                self._total -= self._entries.pop(key)
+            self._entries[key] = len(body)
+            self._total += len(body)
+            # Opened before evicting; the new bill is the most recently used
+            # entry, so this loop never removes it
+            f = open(path, "rb")
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_key, size = self._entries.popitem(last=False)
+                self._total -= size
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    # Already removed, or still open for a response on
+                    # Windows; found again when the index is next loaded
+                    pass
+        return f
+
+    def get(self, key: str, render: Callable[[], bytes]) -> BinaryIO:
+        """
+        Open the cached bill for key, rendering it on a miss
+
+        Returns:
+            The open file, which the caller must close
+        """
+        f = self.lookup(key)
+        if f is None:
+            f = self.store(key, render())
+        return f
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _parse_range(header: str, size: int):
+    """
+    Parse a single "bytes=start-end" range
+
+    Returns:
+        tuple (start, end) inclusive, None if the header should be ignored,
+        or False if the range cannot be satisfied
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Multiple ranges are answered with the whole file
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if start == "":
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _file_chunks(f: BinaryIO, start: int, length: int):
+    f.seek(start)
+    while length > 0:
+        chunk = f.read(min(BILL_CHUNK_SIZE, length))
+        if not chunk:
+            break
+        length -= len(chunk)
+        yield chunk
+
+
+def bill_file_response(request: Request, f: BinaryIO, key: str, filename: str) -> Response:
+    """
+    Serve a cached bill, honouring If-None-Match and single byte ranges
+
+    The bill is streamed from the open file in chunks, which is closed once
+    the response has been sent.
+
+    Args:
+        request: The incoming request
+        f: Open PDF returned by BillCache.get
+        key: The bill's cache key, used as its ETag
+        filename: Download filename for Content-Disposition
+
+    Returns:
+        Response: 304, 206 with the requested range, 416, or the whole bill
+    """
+    etag = f'"{key[:32]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        f.close()
+        return Response(status_code=304, headers=headers)
+
+    size = os.fstat(f.fileno()).st_size
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    # A Range with a stale If-Range validator gets the whole new bill
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is False:
+            f.close()
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _file_chunks(f, start, end - start + 1),
+        status_code=status_code,
+        media_type="application/pdf",
+        headers=headers,
+        background=BackgroundTask(f.close),
+    )
+
+
+bill_cache = BillCache(BILL_CACHE_DIR, BILL_CACHE_MAX_BYTES)
@@ -0,0 +1,133 @@
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Iterator, Optional
+import os
+import zipfile
+
+from ..database import SessionLocal, Order, Settings
+from ..utils.pdf_generator import bill_data, bill_renderer
+from .bill_cache import bill_cache, bill_cache_key
+from .orders import query_orders, attach_person_details
+
+# Orders loaded per query; the session is cleared between batches
+EXPORT_BATCH_SIZE = int(os.getenv("BILL_EXPORT_BATCH_SIZE", "100"))
+# Bills rendering at once, beyond which the export waits for the oldest one
+EXPORT_RENDER_WINDOW = max(2, bill_renderer.workers * 2)
+
+
+class _ZipSink:
+    """
+    Write-only file object that collects what ZipFile writes so it can be
+    yielded and dropped. It cannot seek, so ZipFile writes data descriptors
+    after each entry instead of going back to patch the local headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _default_settings():
+    return Settings(
+        hotel_name="Tabble Hotel",
+        address="123 Main Street, City",
+        contact_number="+1 123-456-7890",
+        email="info@tabblehotel.com",
+    )
+
+
+def _cached_bill(key: str) -> Optional[Future]:
+    f = bill_cache.lookup(key)
+    if f is None:
+        return None
+    with f:
+        body = f.read()
+    future = Future()
+    future.set_result(body)
+    return future
+
+
+def _iter_order_batches(db, status: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    last_id = 0
+    while True:
+        query = query_orders(db).filter(Order.id > last_id)
+        if status:
+            query = query.filter(Order.status == status)
+        if start is not None:
+            query = query.filter(Order.created_at >= start)
+        if end is not None:
+            query = query.filter(Order.created_at <= end)
+        orders = query.order_by(Order.id).limit(EXPORT_BATCH_SIZE).all()
+        if not orders:
+            return
+        last_id = orders[-1].id
+        yield attach_person_details(orders)
+
+
+def stream_bills_zip(status: Optional[str], start: Optional[datetime], end: Optional[datetime]) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive with one bill PDF per matching order, oldest first
+
+    Orders are loaded in batches and only plain bill data is kept, bills
+    render in the worker pool with at most EXPORT_RENDER_WINDOW in flight,
+    and each finished bill is written to the archive and yielded straight
+    away. Memory use does not depend on the number of orders. Bills already
+    in the bill cache are not rendered again.
+
+    Args:
+        status: Only export orders with this status, if given
+        start: Only orders created at or after this time
+        end: Only orders created at or before this time
+    """
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    pending = deque()
+
+    def write_oldest():
+        name, date_time, result = pending.popleft()
+        archive.writestr(zipfile.ZipInfo(name, date_time), result.result())
+        return sink.drain()
+
+    db = SessionLocal()
+    try:
+        settings = db.query(Settings).first() or _default_settings()
+        settings_version = settings.updated_at
+
+        for orders in _iter_order_batches(db, status, start, end):
+            for order in orders:
+                data = bill_data([order], settings)
+                created_at = order.created_at or datetime.now()
+                name = f"bill_order_{order.id}_{created_at.strftime('%Y%m%d')}.pdf"
+
+                result = _cached_bill(bill_cache_key(data, settings_version))
+                if result is None:
+                    result = bill_renderer.submit(data)
+                pending.append((name, created_at.timetuple()[:6], result))
+
+                if len(pending) >= EXPORT_RENDER_WINDOW:
+                    yield write_oldest()
+
+            # Drop the batch's objects and end the read transaction so a long
+            # export doesn't hold one open
+            db.expunge_all()
+            db.rollback()
+    finally:
+        db.close()
+
+    while pending:
+        yield write_oldest()
+
+    archive.close()
+    yield sink.drain()
@@ -0,0 +1,252 @@
+from sqlalchemy import func, select, Boolean, Date, DateTime, Float, Integer
+from datetime import date, datetime
+from typing import Iterator, Optional
+import csv
+import importlib.util
+import io
+import os
+
+from ..database import ReadSessionLocal, Order, OrderItem, Dish, Person, Feedback
+
+# pyarrow is only needed for Parquet and Arrow exports. It is imported by the
+# first such export rather than by every worker at startup.
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+pyarrow = None
+
+# Rows fetched per round trip; server databases stream them from a cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# Exported columns per dataset. Each dataset is exported in id order so
+# "since_id" picks up exactly the rows added after the previous export.
+DATASETS = {
+    "orders": {
+        "columns": [
+            Order.id,
+            Order.table_number,
+            Order.unique_id,
+            Order.person_id,
+            Order.status,
+            Order.total_amount,
+            Order.item_count,
+            Order.created_at,
+            Order.updated_at,
+        ],
+        "id": Order.id,
+        "created_at": Order.created_at,
+    },
+    "order_items": {
+        "columns": [
+            OrderItem.id,
+            OrderItem.order_id,
+            OrderItem.dish_id,
+            Dish.name.label("dish_name"),
+            Dish.category.label("dish_category"),
+            OrderItem.quantity,
+            OrderItem.unit_price,
+            OrderItem.remarks,
+            OrderItem.created_at,
+        ],
+        "join": (Dish, OrderItem.dish_id == Dish.id),
+        "id": OrderItem.id,
+        "created_at": OrderItem.created_at,
+    },
+    # Passwords are never exported
+    "persons": {
+        "columns": [
+            Person.id,
+            Person.username,
+            Person.phone_number,
+            Person.visit_count,
+            Person.last_visit,
+            Person.created_at,
+        ],
+        "id": Person.id,
+        "created_at": Person.created_at,
+    },
+    "feedback": {
+        "columns": [
+            Feedback.id,
+            Feedback.order_id,
+            Feedback.person_id,
+            Feedback.rating,
+            Feedback.comment,
+            Feedback.created_at,
+        ],
+        "id": Feedback.id,
+        "created_at": Feedback.created_at,
+    },
+}
+
+
+def _import_pyarrow():
+    global pyarrow
+    if pyarrow is None:
+        import pyarrow.ipc
+        import pyarrow.parquet
+    return pyarrow
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pyarrow.bool_()
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+    if isinstance(column.type, Float):
+        return pyarrow.float64()
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp("us")
+    if isinstance(column.type, Date):
+        return pyarrow.date32()
+    return pyarrow.string()
+
+
+def _filtered(dataset: dict, statement, since_id, start, end, max_id):
+    if "join" in dataset:
+        statement = statement.outerjoin(*dataset["join"])
+    if since_id is not None:
+        statement = statement.where(dataset["id"] > since_id)
+    if max_id is not None:
+        statement = statement.where(dataset["id"] <= max_id)
+    if start is not None:
+        statement = statement.where(dataset["created_at"] >= start)
+    if end is not None:
+        statement = statement.where(dataset["created_at"] <= end)
+    return statement
+
+
+def export_upper_bound(name: str, since_id: Optional[int] = None) -> Optional[int]:
+    """
+    Highest id the export of a dataset will include
+
+    The bound is fixed before streaming starts, so rows inserted while an
+    export is streaming are left for the next one. Clients pass this value
+    as since_id on their next sync.
+
+    Ids are handed out when a row is inserted, not when it commits. On
+    PostgreSQL a transaction still open when the bound is read can commit
+    a row with a lower id afterwards, and a since_id sync never fetches it.
+    Syncs that must not miss rows should re-fetch some overlap below the
+    last id and drop duplicates. SQLite has a single writer, so its ids
+    follow commit order.
+    """
+    dataset = DATASETS[name]
+    db = ReadSessionLocal()
+    try:
+        max_id = db.execute(select(func.max(dataset["id"]))).scalar()
+    finally:
+        db.close()
+    return max_id if max_id is not None else since_id
+
+
+def _iter_batches(name, since_id, start, end, max_id):
+    dataset = DATASETS[name]
+    statement = _filtered(dataset, select(*dataset["columns"]), since_id, start, end, max_id)
+    statement = statement.order_by(dataset["id"]).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    db = ReadSessionLocal()
+    try:
+        for rows in db.execute(statement).partitions():
+            yield rows
+    finally:
+        db.close()
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _stream_csv(name, batches) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in DATASETS[name]["columns"]])
+    for rows in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+class _Sink:
+    """
+    Write-only file object handed to pyarrow writers so each record batch
+    can be yielded as soon as it is encoded
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _stream_arrow(name, batches, export_format) -> Iterator[bytes]:
+    _import_pyarrow()
+    columns = DATASETS[name]["columns"]
+    schema = pyarrow.schema([(column.name, _arrow_type(column)) for column in columns])
+    sink = _Sink()
+    if export_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    for rows in batches:
+        arrays = [
+            pyarrow.array([row[index] for row in rows], type=field.type)
+            for index, field in enumerate(schema)
+        ]
+        writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(
+    name: str,
+    export_format: str,
+    since_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_id: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Stream a dataset as CSV, Parquet or an Arrow IPC stream
+
+    Rows are read EXPORT_BATCH_SIZE at a time and each batch is encoded and
+    yielded before the next is fetched, so memory use does not depend on the
+    size of the table.
+
+    Args:
+        name: Key of DATASETS
+        export_format: "csv", "parquet" or "arrow"
+        since_id: Only rows with a greater id
+        start: Only rows created at or after this time
+        end: Only rows created at or before this time
+        max_id: Only rows with an id up to this one (see export_upper_bound)
+    """
+    batches = _iter_batches(name, since_id, start, end, max_id)
+    if export_format == "csv":
+        return _stream_csv(name, batches)
+    return _stream_arrow(name, batches, export_format)
@@ -1,31 +1,53 @@
-import firebase_admin
-from firebase_admin import credentials, auth
-import os
-import json
 from fastapi import HTTPException, status
+import os
+import threading
 
-# Initialize Firebase Admin SDK
+# Firebase Admin SDK credentials
 cred_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
                          "app", "tabble-v1-firebase-adminsdk-fbsvc-8024adcbdf.json")
 
-# Global variable to track initialization
+# Global variable to track initialization. The SDK (firebase_admin and
+# google-auth) is imported and initialised on the first phone verification
+# rather than when the app starts, as most workers never need it.
 firebase_initialized = False
+_firebase_attempted = False
+_firebase_lock = threading.Lock()
+
+
+def init_firebase() -> bool:
+    """
+    Initialise the Firebase Admin SDK once per process
+
+    Returns:
+        bool: Whether Firebase is available
+    """
+    global firebase_initialized, _firebase_attempted
+    with _firebase_lock:
+        if _firebase_attempted:
+            return firebase_initialized
+        _firebase_attempted = True
+
+        try:
+            import firebase_admin
+            from firebase_admin import credentials
+
+            # Check if Firebase is already initialized
+            try:
+                firebase_admin.get_app()
+                firebase_initialized = True
+                print("Firebase already initialized")
+            except ValueError:
+                # Initialize Firebase if not already initialized
+                cred = credentials.Certificate(cred_path)
+                firebase_admin.initialize_app(cred)
+                firebase_initialized = True
+                print("Firebase initialized successfully")
+        except Exception as e:
+            print(f"Firebase initialization error: {e}")
+            # Continue without crashing, but authentication will fail
+
+        return firebase_initialized
 
-try:
-    # Check if Firebase is already initialized
-    try:
-        firebase_app = firebase_admin.get_app()
-        firebase_initialized = True
-        print("Firebase already initialized")
-    except ValueError:
-        # Initialize Firebase if not already initialized
-        cred = credentials.Certificate(cred_path)
-        firebase_app = firebase_admin.initialize_app(cred)
-        firebase_initialized = True
-        print("Firebase initialized successfully")
-except Exception as e:
-    print(f"Firebase initialization error: {e}")
-    # Continue without crashing, but authentication will fail
 
 # Firebase Authentication functions
 def verify_phone_number(phone_number):
@@ -35,7 +57,7 @@ def verify_phone_number(phone_number):
     """
     try:
         # Check if Firebase is initialized
-        if not firebase_initialized:
+        if not init_firebase():
             print("Firebase is not initialized, using mock verification")
 
         # Validate phone number format (should start with +91)
@@ -73,7 +95,7 @@ def verify_otp(phone_number, otp, session_info=None):
     """
     try:
         # Check if Firebase is initialized
-        if not firebase_initialized:
+        if not init_firebase():
             print("Firebase is not initialized, using mock verification")
 
         # Validate OTP format
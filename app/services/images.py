@@ -0,0 +1,178 @@
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from functools import lru_cache
+import hashlib
+import os
+import uuid
+
+from ..database import SessionLocal, Dish
+
+# Largest accepted upload
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Hex digits of the content hash kept in stored file names
+CONTENT_HASH_LENGTH = 16
+
+DISH_IMAGE_DIR = "app/static/images/dishes"
+DISH_IMAGE_URL = "/static/images/dishes"
+
+# Menu card thumbnail (cropped to exactly this size) and the longest side
+# of the full-size variants
+THUMBNAIL_SIZE = (320, 240)
+DISPLAY_MAX_SIZE = 1200
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+# Pillow is imported on the first upload rather than when a worker starts
+Image = None
+ImageOps = None
+
+
+def _import_pillow():
+    global Image, ImageOps
+    if Image is None:
+        from PIL import Image, ImageOps
+    return Image
+
+
+@lru_cache(maxsize=None)
+def has_avif() -> bool:
+    # AVIF needs a Pillow build with libavif
+    from PIL import features
+    return features.check("avif")
+
+
+def _copy_upload(source, destination: str, max_bytes: int) -> str:
+    written = 0
+    digest = hashlib.sha256()
+    try:
+        with open(destination, "wb") as buffer:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Image exceeds the {max_bytes // 1024} KB upload limit",
+                    )
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        # Don't leave a partial file behind
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+    return digest.hexdigest()
+
+
+def _verify_image(path: str):
+    _import_pillow()
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail="Uploaded file is not a supported image")
+
+
+async def save_upload(
+    upload: UploadFile,
+    directory: str,
+    prefix: str,
+    max_bytes: int = IMAGE_UPLOAD_MAX_BYTES,
+    verify: bool = True,
+) -> str:
+    """
+    Copy an uploaded image to disk in chunks on the threadpool, check that it
+    can be decoded (if verify is set) and name it after its content hash
+
+    The hashed name changes whenever the content does, so the file can be
+    served with immutable caching.
+
+    Args:
+        upload: The uploaded file
+        directory: Target directory, created if missing
+        prefix: File name prefix, e.g. "dish_"
+        max_bytes: Uploads larger than this are rejected with 413
+        verify: Reject files Pillow cannot decode with 400. Off for uploads
+            that are stored as is, e.g. a logo in SVG or HEIC
+
+    Returns:
+        str: Path of the written file, e.g. directory/dish_<hash>.jpg
+    """
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(os.path.basename(upload.filename or ""))[1].lower()
+    temp_path = os.path.join(directory, f".upload_{uuid.uuid4().hex}{extension}")
+    digest = await run_in_threadpool(_copy_upload, upload.file, temp_path, max_bytes)
+    if verify:
+        await run_in_threadpool(_verify_image, temp_path)
+
+    destination = os.path.join(directory, f"{prefix}{digest[:CONTENT_HASH_LENGTH]}{extension}")
+    os.replace(temp_path, destination)
+    return destination
+
+
+def generate_variants(source_path: str, directory: str, stem: str) -> dict:
+    """
+    Write a cropped thumbnail and downscaled WebP (and AVIF, when Pillow
+    supports it) copies of an image
+
+    Args:
+        source_path: The uploaded original
+        directory: Where to write the variants
+        stem: File name prefix for the variants
+
+    Returns:
+        dict: File names keyed by "thumbnail", "webp" and "avif"
+    """
+    _import_pillow()
+    variants = {}
+    with Image.open(source_path) as original:
+        # Phone photos are often stored sideways with an EXIF rotation
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        thumbnail = ImageOps.fit(image, THUMBNAIL_SIZE, Image.LANCZOS)
+        variants["thumbnail"] = f"{stem}_thumb.webp"
+        thumbnail.save(os.path.join(directory, variants["thumbnail"]), "WEBP", quality=WEBP_QUALITY, method=4)
+
+        display = image.copy()
+        display.thumbnail((DISPLAY_MAX_SIZE, DISPLAY_MAX_SIZE), Image.LANCZOS)
+        variants["webp"] = f"{stem}.webp"
+        display.save(os.path.join(directory, variants["webp"]), "WEBP", quality=WEBP_QUALITY, method=4)
+
+        if has_avif():
+            variants["avif"] = f"{stem}.avif"
+            display.save(os.path.join(directory, variants["avif"]), "AVIF", quality=AVIF_QUALITY)
+
+    return variants
+
+
+def process_dish_image(dish_id: int, image_path: str, source_path: str):
+    """
+    Background task: build a dish's image variants and store their URLs
+
+    The variants are only recorded if the dish still shows the same image,
+    so a quick second upload is not overwritten by the first one's task.
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    try:
+        variants = generate_variants(source_path, DISH_IMAGE_DIR, stem)
+    except Exception as e:
+        print(f"Could not create image variants for dish {dish_id}: {str(e)}")
+        return
+
+    db = SessionLocal()
+    try:
+        db_dish = db.query(Dish).filter(Dish.id == dish_id).first()
+        if db_dish is None or db_dish.image_path != image_path:
+            return
+        db_dish.thumbnail_path = f"{DISH_IMAGE_URL}/{variants['thumbnail']}"
+        db_dish.image_webp_path = f"{DISH_IMAGE_URL}/{variants['webp']}"
+        db_dish.image_avif_path = f"{DISH_IMAGE_URL}/{variants['avif']}" if "avif" in variants else None
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,191 @@
+from fastapi import Request, Response
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from typing import Awaitable, Callable, Dict, Tuple
+import hashlib
+import itertools
+import os
+import threading
+import time
+
+from ..database import engine, async_engine, Dish, MenuVersion
+
+# Seconds a process trusts its menu snapshots before checking the stored
+# menu version again. Dish changes made by another process show up within
+# this time; changes made by this process show up at once.
+MENU_VERSION_TTL = float(os.getenv("MENU_VERSION_TTL", "2"))
+
+_menu_version_query = select(MenuVersion.version).where(MenuVersion.id == 1)
+
+
+def read_menu_version() -> int:
+    with engine.connect() as connection:
+        return connection.execute(_menu_version_query).scalar() or 0
+
+
+async def read_menu_version_async() -> int:
+    async with async_engine.connect() as connection:
+        return (await connection.execute(_menu_version_query)).scalar() or 0
+
+
+class MenuCache:
+    """
+    Process-wide cache of serialised menu responses
+
+    Snapshots are stored as ready-to-send JSON bytes together with an ETag and
+    are valid for one menu version, which is stored in the menu_version table
+    and bumped in the same transaction as every dish change (see the session
+    hooks below). The stored version is read again once the last check is
+    older than the TTL, so a snapshot outlives a dish change made by another
+    process by at most that long. bump() drops this process's snapshots right
+    after its own dish changes commit.
+    """
+
+    def __init__(self, ttl: float = 2):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Stored menu version the snapshots were built at (None before the
+        # first check) and when it was last read
+        self._version = None
+        self._checked_at = 0.0
+        # Bumped whenever the snapshots are dropped, so a snapshot built
+        # before that is not stored
+        self._generation = 0
+        self._snapshots: Dict[str, Tuple[bytes, str]] = {}
+
+    def bump(self):
+        """
+        Invalidate all snapshots after this process changed the dishes table;
+        the stored version is read again on the next lookup
+        """
+        with self._lock:
+            self._generation += 1
+            self._snapshots.clear()
+            self._checked_at = 0.0
+
+    def _due(self) -> bool:
+        with self._lock:
+            return time.monotonic() >= self._checked_at + self.ttl
+
+    def _adopt(self, version: int):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if version != self._version:
+                self._version = version
+                self._generation += 1
+                self._snapshots.clear()
+
+    def _lookup(self, key: str):
+        with self._lock:
+            return self._snapshots.get(key), self._generation
+
+    def lookup(self, key: str):
+        """
+        Get the current snapshot for key without building it, reading the
+        stored menu version first if the TTL has passed
+
+        Returns:
+            tuple: ((body, etag) or None, generation). Pass the generation to
+            store() so a snapshot built while the menu changed is not kept.
+        """
+        if self._due():
+            self._adopt(read_menu_version())
+        return self._lookup(key)
+
+    async def lookup_async(self, key: str):
+        """
+        Same as lookup, reading the stored menu version on the async engine
+        """
+        if self._due():
+            self._adopt(await read_menu_version_async())
+        return self._lookup(key)
+
+    def store(self, key: str, generation: int, body: bytes) -> Tuple[bytes, str]:
+        """
+        Store a freshly built body for key and return it with its ETag
+        """
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        with self._lock:
+            if self._generation == generation:
+                self._snapshots[key] = (body, etag)
+        return body, etag
+
+    def get(self, key: str, build: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """
+        Get the snapshot for key, building it on a miss
+
+        Args:
+            key: Identifies the response, e.g. "menu:Dessert"
+            build: Returns the serialised JSON body; only called on a miss
+
+        Returns:
+            tuple: (body, etag)
+        """
+        snapshot, generation = self.lookup(key)
+        if snapshot is not None:
+            return snapshot
+        return self.store(key, generation, build())
+
+
+def _snapshot_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_json_response(request: Request, key: str, build: Callable[[], bytes]) -> Response:
+    """
+    Serve a menu snapshot, answering 304 when the client already has it
+
+    Args:
+        request: The incoming request, checked for If-None-Match
+        key: Snapshot key passed to MenuCache.get
+        build: Returns the serialised JSON body on a cache miss
+
+    Returns:
+        Response: 304 if the client's ETag matches, otherwise the JSON body
+    """
+    body, etag = menu_cache.get(key, build)
+    return _snapshot_response(request, body, etag)
+
+
+async def cached_json_response_async(request: Request, key: str, build: Callable[[], Awaitable[bytes]]) -> Response:
+    """
+    Same as cached_json_response for endpoints on the async database path;
+    build is a coroutine function
+    """
+    snapshot, generation = await menu_cache.lookup_async(key)
+    if snapshot is None:
+        snapshot = menu_cache.store(key, generation, await build())
+    return _snapshot_response(request, *snapshot)
+
+
+# Shared by the customer menu endpoints and the dish session hooks below
+menu_cache = MenuCache(ttl=MENU_VERSION_TTL)
+
+
+# Bump the stored menu version in the transaction that changes the dishes,
+# and drop this process's snapshots once it commits. Writes that bypass the
+# ORM session (raw SQL, other tools) must bump menu_version themselves.
+@event.listens_for(Session, "after_flush")
+def _bump_menu_version(session, flush_context):
+    if any(isinstance(obj, Dish) for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.connection().execute(
+            update(MenuVersion).where(MenuVersion.id == 1).values(version=MenuVersion.version + 1)
+        )
+        session.info["menu_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_menu_snapshots(session):
+    if session.info.pop("menu_changed", False):
+        menu_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_menu_change(session):
+    session.info.pop("menu_changed", None)
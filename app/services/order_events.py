@@ -0,0 +1,151 @@
+from collections import deque
+from typing import Optional, List, Tuple
+import asyncio
+import threading
+import uuid
+import json
+
+
+class OrderEventBroker:
+    """
+    In-process publish/subscribe broker for order state changes
+
+    Every published event gets a sequence number. The most recent events are
+    kept in a ring buffer so a reconnecting subscriber can replay what it
+    missed instead of reloading the full order list. Publishers may run on any
+    thread (sync endpoints run in the threadpool); subscribers are asyncio
+    queues owned by the event loop that serves the stream.
+    """
+
+    def __init__(self, history_size: int = 1000):
+        self.stream_id = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    def reset(self):
+        """
+        Start a new stream with a fresh id and no history or subscribers
+
+        Called in a forked worker, which would otherwise carry on the stream
+        of the process it was forked from.
+        """
+        # The lock is replaced too, in case the fork happened while it was held
+        self._lock = threading.Lock()
+        with self._lock:
+            self.stream_id = uuid.uuid4().hex[:8]
+            self._sequence = 0
+            self._history.clear()
+            self._subscribers = set()
+
+    def publish(self, event_type: str, order_id: int, status: str, **data) -> dict:
+        """
+        Publish an order event to all subscribers
+
+        Args:
+            event_type: Event name, e.g. "order_created"
+            order_id: The order the event is about
+            status: The order status after the change
+            **data: Extra JSON-serialisable fields to include in the event
+
+        Returns:
+            dict: The published event including its sequence number
+        """
+        with self._lock:
+            self._sequence += 1
+            event = {
+                "seq": self._sequence,
+                "type": event_type,
+                "order_id": order_id,
+                "status": status,
+                **data,
+            }
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            loop, queue = subscriber
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down
+                self._discard(subscriber)
+
+        return event
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[tuple, Optional[List[dict]], int]:
+        """
+        Register a subscriber on the running event loop
+
+        Args:
+            last_event_id: Id of the last event the client saw, if resuming
+
+        Returns:
+            tuple: (subscription, backlog, sequence). backlog holds the events
+            to replay, or None when the client cannot resume and needs a full
+            snapshot. sequence is the broker sequence at subscription time.
+        """
+        subscription = (asyncio.get_running_loop(), asyncio.Queue())
+
+        with self._lock:
+            self._subscribers.add(subscription)
+            backlog = self._backlog_since(last_event_id)
+            return subscription, backlog, self._sequence
+
+    def unsubscribe(self, subscription: tuple):
+        self._discard(subscription)
+
+    def event_id(self, sequence: int) -> str:
+        """
+        Build the client-facing id for a sequence number
+
+        The id carries the stream id so a client resuming against a restarted
+        process (whose sequence started over) gets a fresh snapshot.
+        """
+        return f"{self.stream_id}-{sequence}"
+
+    def _discard(self, subscription: tuple):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _backlog_since(self, last_event_id: Optional[str]) -> Optional[List[dict]]:
+        # Must be called with the lock held
+        if not last_event_id:
+            return None
+
+        stream_id, _, sequence = last_event_id.rpartition("-")
+        if stream_id != self.stream_id or not sequence.isdigit():
+            return None
+
+        sequence = int(sequence)
+        if sequence > self._sequence:
+            return None
+        if sequence == self._sequence:
+            return []
+
+        # The client is too far behind if the next event it needs was evicted
+        if not self._history or self._history[0]["seq"] > sequence + 1:
+            return None
+
+        return [event for event in self._history if event["seq"] > sequence]
+
+
+def format_sse(event_type: str, data: dict, event_id: Optional[str] = None) -> str:
+    """
+    Format a Server-Sent Events message
+    """
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+# Process-wide broker used by the order endpoints and the kitchen feed
+broker = OrderEventBroker()
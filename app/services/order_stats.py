@@ -0,0 +1,163 @@
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, attributes
+from collections import Counter
+from typing import Dict, Optional
+import os
+import threading
+import time
+
+from ..database import SessionLocal, Order
+
+# Seconds between recounts from the database. Changes made outside this
+# process (other workers, scripts, raw SQL) show up within this time.
+ORDER_STATS_RECONCILE_SECONDS = float(os.getenv("ORDER_STATS_RECONCILE_SECONDS", "60"))
+
+
+def count_orders_by_status(db) -> Counter:
+    """
+    Count orders per status with a single GROUP BY query
+    """
+    rows = db.execute(select(Order.status, func.count()).group_by(Order.status))
+    return Counter({status: count for status, count in rows})
+
+
+class OrderStatusCounter:
+    """
+    Live count of orders per status, kept in memory
+
+    Every committed ORM change to an order (create, status change, delete)
+    adjusts the counts through the session hooks below, so reading them
+    costs no query. The counts are recounted from the database when they are
+    older than the reconcile interval, and as soon as a write the hooks
+    can't follow (a bulk UPDATE or DELETE of orders) is committed.
+    """
+
+    def __init__(self, reconcile_interval: float = 60):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        self._counts: Optional[Counter] = None
+        self._reconcile_at = 0.0
+        # Bumped by every change applied, so a recount that raced with a
+        # commit can tell its result may be off by that change
+        self._generation = 0
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Orders per status, recounted first if the counts are due
+
+        Returns:
+            dict: Status -> number of orders
+        """
+        with self._lock:
+            if self._counts is not None and time.monotonic() < self._reconcile_at:
+                return dict(self._counts)
+        return self.reconcile()
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Recount orders per status from the database
+        """
+        # Concurrent readers that find the counts due wait for one recount
+        with self._reconcile_lock:
+            with self._lock:
+                if self._counts is not None and time.monotonic() < self._reconcile_at:
+                    return dict(self._counts)
+                generation = self._generation
+
+            db = SessionLocal()
+            try:
+                counts = count_orders_by_status(db)
+            finally:
+                db.close()
+
+            with self._lock:
+                self._counts = counts
+                if generation == self._generation:
+                    self._reconcile_at = time.monotonic() + self.reconcile_interval
+                else:
+                    # A change was applied while counting; it may or may not be
+                    # in the result, so count again on the next read
+                    self._reconcile_at = 0.0
+                return dict(counts)
+
+    def apply(self, changes: Counter):
+        """
+        Add committed per-status changes (negative for orders that left a status)
+        """
+        with self._lock:
+            self._generation += 1
+            if self._counts is None:
+                return
+            self._counts.update(changes)
+            self._counts = +self._counts
+
+    def invalidate(self):
+        """
+        Recount on the next read
+        """
+        with self._lock:
+            self._generation += 1
+            self._reconcile_at = 0.0
+
+
+order_status_counter = OrderStatusCounter(reconcile_interval=ORDER_STATS_RECONCILE_SECONDS)
+
+
+def _previous_status(order):
+    history = attributes.get_history(order, "status")
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+# Collect the status changes a session flushes and apply them to the counter
+# once the transaction commits
+@event.listens_for(Session, "after_flush")
+def _record_status_changes(session, flush_context):
+    changes = session.info.setdefault("order_status_changes", Counter())
+    for order in session.new:
+        if isinstance(order, Order):
+            changes[order.status] += 1
+    for order in session.dirty:
+        if isinstance(order, Order):
+            history = attributes.get_history(order, "status")
+            if history.added and history.deleted:
+                changes[history.deleted[0]] -= 1
+                changes[history.added[0]] += 1
+            elif history.added:
+                # The status was set while unloaded (e.g. expired by a
+                # commit), so the status it replaced is unknown
+                session.info["order_status_unknown"] = True
+    for order in session.deleted:
+        if isinstance(order, Order):
+            status = _previous_status(order)
+            if status is None:
+                session.info["order_status_unknown"] = True
+            else:
+                changes[status] -= 1
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_order_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table is Order.__table__:
+            orm_execute_state.session.info["order_status_unknown"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_status_changes(session):
+    changes = session.info.pop("order_status_changes", None)
+    if session.info.pop("order_status_unknown", False):
+        order_status_counter.invalidate()
+    elif changes:
+        order_status_counter.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_status_changes(session):
+    session.info.pop("order_status_changes", None)
+    session.info.pop("order_status_unknown", None)
@@ -0,0 +1,176 @@
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Optional, Tuple
+from datetime import datetime
+import base64
+
+from ..database import Order, OrderItem
+
+
+def order_detail_options():
+    """
+    Loader options that fetch an order's person and its items with their dishes
+
+    Items are loaded with a single IN query per batch of orders and dishes are
+    joined onto that query, so the number of statements does not grow with the
+    number of orders or items.
+    """
+    return (
+        joinedload(Order.person),
+        selectinload(Order.items).joinedload(OrderItem.dish),
+    )
+
+
+def query_orders(db: Session):
+    """
+    Build an order query with person, items and dishes eager-loaded
+
+    Args:
+        db: The database session
+
+    Returns:
+        Query: A query over Order that callers can filter and sort further
+    """
+    return db.query(Order).options(*order_detail_options())
+
+
+def attach_person_details(orders: List[Order]):
+    """
+    Copy the loaded person's name and visit count onto each order so the
+    response models can expose them
+    """
+    for order in orders:
+        if order.person is not None:
+            order.person_name = order.person.username
+            order.visit_count = order.person.visit_count
+    return orders
+
+
+def get_order_with_details(db: Session, order_id: int):
+    """
+    Get a single order with person, items and dishes loaded
+
+    Returns:
+        Order or None if the order does not exist
+    """
+    order = query_orders(db).filter(Order.id == order_id).first()
+    if order is not None:
+        attach_person_details([order])
+    return order
+
+
+def select_orders():
+    """
+    Same as query_orders as a 2.0-style select, for use with AsyncSession
+    """
+    return select(Order).options(*order_detail_options())
+
+
+async def get_order_with_details_async(db: AsyncSession, order_id: int):
+    """
+    Async version of get_order_with_details
+
+    Returns:
+        Order or None if the order does not exist
+    """
+    result = await db.execute(select_orders().where(Order.id == order_id))
+    order = result.scalars().first()
+    if order is not None:
+        attach_person_details([order])
+    return order
+
+
+def get_orders_with_details(db: Session, order_ids: List[int]):
+    """
+    Get several orders with person, items and dishes loaded in a fixed number
+    of queries
+
+    Returns:
+        dict: Orders keyed by id; ids that do not exist are missing from the dict
+    """
+    if not order_ids:
+        return {}
+    orders = query_orders(db).filter(Order.id.in_(order_ids)).all()
+    attach_person_details(orders)
+    return {order.id: order for order in orders}
+
+
+def refresh_order_totals(db: Session, order: Order):
+    """
+    Recalculate an order's stored total_amount and item_count from its items
+
+    Call after items were added to or moved between orders. Pending changes
+    are flushed first so the aggregate sees them.
+    """
+    db.flush()
+    total_amount, item_count = (
+        db.query(
+            func.coalesce(func.sum(OrderItem.unit_price * OrderItem.quantity), 0),
+            func.count(OrderItem.id),
+        )
+        .filter(OrderItem.order_id == order.id)
+        .one()
+    )
+    order.total_amount = total_amount
+    order.item_count = item_count
+    return order
+
+
+def encode_order_cursor(order: Order) -> str:
+    """
+    Encode the (created_at, id) sort key of an order as an opaque cursor
+    """
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_order_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_order_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(order_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def paginate_orders(query, limit: int, cursor: Optional[str] = None):
+    """
+    Apply keyset pagination on (created_at, id), newest first
+
+    Args:
+        query: An Order query with any filters already applied
+        limit: Maximum number of orders to return
+        cursor: Cursor of the last order on the previous page, if any
+
+    Returns:
+        tuple: (orders, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        created_at, order_id = decode_order_cursor(cursor)
+        query = query.filter(
+            or_(
+                Order.created_at < created_at,
+                and_(Order.created_at == created_at, Order.id < order_id),
+            )
+        )
+
+    # Fetch one extra row to know whether another page exists
+    orders = (
+        query.order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_order_cursor(orders[-1])
+
+    return orders, next_cursor
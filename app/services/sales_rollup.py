@@ -0,0 +1,308 @@
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from ..database import DailySalesRollup, SalesRollupState, Order, OrderItem, Dish
+
+# Sales analytics only count paid orders, so only paid orders are rolled up
+ROLLUP_STATUS = "paid"
+
+# Columns of the rollup's unique index (ux_daily_sales_rollup_key). NULL
+# table numbers and dish ids (the order-level rows) are folded to -1 so they
+# collide like any other key.
+ROLLUP_KEY = (
+    DailySalesRollup.date,
+    text("coalesce(table_number, -1)"),
+    text("coalesce(dish_id, -1)"),
+)
+
+
+def _as_date(value) -> date:
+    # func.date() returns a string on SQLite and a date on PostgreSQL
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _as_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    # Timestamps are stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _insert(db: Session):
+    # INSERT ... ON CONFLICT is spelled the same on both supported backends,
+    # but SQLAlchemy builds it from the dialect's own insert()
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(DailySalesRollup)
+    return sqlite.insert(DailySalesRollup)
+
+
+def _upsert(db: Session, day: date, table_number, category, dish_id, order_count, quantity, revenue):
+    # A single statement, so concurrent payments for the same day and table
+    # add to one row instead of losing an increment or inserting a second row
+    statement = _insert(db).values(
+        date=day,
+        table_number=table_number,
+        category=category,
+        dish_id=dish_id,
+        order_count=order_count,
+        quantity=quantity,
+        revenue=revenue,
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "order_count": DailySalesRollup.order_count + statement.excluded.order_count,
+            "quantity": DailySalesRollup.quantity + statement.excluded.quantity,
+            "revenue": DailySalesRollup.revenue + statement.excluded.revenue,
+        },
+    ))
+
+
+def apply_order(db: Session, order: Order, sign: int = 1):
+    """
+    Add an order's sales to the rollup, or remove them with sign=-1
+
+    Call when an order becomes paid (sign=1) or when a paid order's items are
+    about to change (sign=-1, then sign=1 afterwards). The caller commits.
+    """
+    day = _as_utc_naive(order.created_at).date()
+
+    per_dish = defaultdict(lambda: [None, 0, 0.0])
+    for item in order.items:
+        entry = per_dish[item.dish_id]
+        entry[0] = item.dish.category if item.dish else None
+        entry[1] += item.quantity
+        entry[2] += (item.unit_price or 0) * item.quantity
+
+    for dish_id, (category, quantity, revenue) in per_dish.items():
+        _upsert(db, day, order.table_number, category, dish_id, sign, sign * quantity, sign * revenue)
+
+    _upsert(
+        db,
+        day,
+        order.table_number,
+        None,
+        None,
+        sign,
+        sign * sum(entry[1] for entry in per_dish.values()),
+        sign * (order.total_amount or 0),
+    )
+
+
+def set_order_status(db: Session, order: Order, status: str):
+    """
+    Change an order's status, adding it to the rollup when it becomes paid
+    and taking it out when it stops being paid. Every status change goes
+    through here so the rollup never counts an order that isn't paid. The
+    caller commits.
+    """
+    previous_status = order.status
+    order.status = status
+    if previous_status != ROLLUP_STATUS and status == ROLLUP_STATUS:
+        apply_order(db, order)
+    elif previous_status == ROLLUP_STATUS and status != ROLLUP_STATUS:
+        apply_order(db, order, sign=-1)
+
+
+def rebuild(db: Session):
+    """
+    Recompute the whole rollup from the orders tables and mark it as covering
+    the full history
+    """
+    db.query(DailySalesRollup).delete()
+
+    day = func.date(Order.created_at)
+
+    # Order-level totals per day and table
+    order_rows = (
+        db.query(
+            day.label("day"),
+            Order.table_number,
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.total_amount), 0),
+        )
+        .filter(Order.status == ROLLUP_STATUS)
+        .group_by(day, Order.table_number)
+        .all()
+    )
+
+    # Per-dish breakdown per day and table
+    item_rows = (
+        db.query(
+            day.label("day"),
+            Order.table_number,
+            Dish.category,
+            OrderItem.dish_id,
+            func.count(func.distinct(Order.id)),
+            func.sum(OrderItem.quantity),
+            func.coalesce(func.sum(OrderItem.unit_price * OrderItem.quantity), 0),
+        )
+        .join(Order, OrderItem.order_id == Order.id)
+        .outerjoin(Dish, OrderItem.dish_id == Dish.id)
+        .filter(Order.status == ROLLUP_STATUS)
+        .group_by(day, Order.table_number, Dish.category, OrderItem.dish_id)
+        .all()
+    )
+
+    quantities = defaultdict(int)
+    rows = []
+    for row_day, table_number, category, dish_id, order_count, quantity, revenue in item_rows:
+        quantities[(_as_date(row_day), table_number)] += quantity or 0
+        rows.append(DailySalesRollup(
+            date=_as_date(row_day),
+            table_number=table_number,
+            category=category,
+            dish_id=dish_id,
+            order_count=order_count,
+            quantity=quantity or 0,
+            revenue=revenue,
+        ))
+    for row_day, table_number, order_count, revenue in order_rows:
+        rows.append(DailySalesRollup(
+            date=_as_date(row_day),
+            table_number=table_number,
+            order_count=order_count,
+            quantity=quantities[(_as_date(row_day), table_number)],
+            revenue=revenue,
+        ))
+    db.add_all(rows)
+
+    db.query(SalesRollupState).delete()
+    db.add(SalesRollupState(rebuilt_at=datetime.now(timezone.utc)))
+    db.commit()
+
+    return len(rows)
+
+
+def is_covered(db: Session) -> bool:
+    """
+    The rollup covers all history once it has been rebuilt; after that every
+    paid transition keeps it current
+    """
+    return db.query(SalesRollupState.id).first() is not None
+
+
+def _plan(start: Optional[datetime], end: Optional[datetime]):
+    """
+    Split [start, end] into whole days served from the rollup and the partial
+    edges (including today, which is still changing) served from raw orders
+
+    Returns:
+        tuple: (first_day, last_day, raw_ranges). first_day/last_day bound the
+        rollup days (None = unbounded below); raw_ranges is a list of
+        (from, to, to_inclusive) datetimes. last_day is None when no whole day
+        can be served from the rollup.
+    """
+    today_start = datetime.combine(datetime.now(timezone.utc).date(), time.min)
+
+    if start is None:
+        first_day = None
+    elif start.time() == time.min:
+        first_day = start.date()
+    else:
+        first_day = start.date() + timedelta(days=1)
+
+    last_day = today_start.date() - timedelta(days=1)
+    if end is not None:
+        last_day = min(last_day, end.date() - timedelta(days=1))
+
+    if first_day is not None and first_day > last_day:
+        return None, None, [(start, end, True)]
+
+    raw_ranges = []
+    if first_day is not None and start < datetime.combine(first_day, time.min):
+        raw_ranges.append((start, datetime.combine(first_day, time.min), False))
+    raw_ranges.append((datetime.combine(last_day + timedelta(days=1), time.min), end, True))
+    return first_day, last_day, raw_ranges
+
+
+def _raw_paid_orders(db: Session, columns, start, end, end_inclusive):
+    query = db.query(*columns).filter(Order.status == ROLLUP_STATUS)
+    if start is not None:
+        query = query.filter(Order.created_at >= start)
+    if end is not None:
+        query = query.filter(Order.created_at <= end if end_inclusive else Order.created_at < end)
+    return query
+
+
+def paid_sales_by_day(db: Session, start: Optional[datetime], end: Optional[datetime]) -> Dict[date, Tuple[int, float]]:
+    """
+    Paid order count and revenue per day for orders placed in [start, end]
+
+    Whole past days come from the rollup when it covers history; partial days
+    and today are aggregated from the orders table.
+    """
+    start, end = _as_utc_naive(start), _as_utc_naive(end)
+    totals = defaultdict(lambda: [0, 0.0])
+
+    if is_covered(db):
+        first_day, last_day, raw_ranges = _plan(start, end)
+    else:
+        first_day, last_day, raw_ranges = None, None, [(start, end, True)]
+
+    if last_day is not None:
+        query = (
+            db.query(DailySalesRollup.date, func.sum(DailySalesRollup.order_count), func.sum(DailySalesRollup.revenue))
+            .filter(DailySalesRollup.dish_id.is_(None))
+            .filter(DailySalesRollup.date <= last_day)
+        )
+        if first_day is not None:
+            query = query.filter(DailySalesRollup.date >= first_day)
+        for row_day, order_count, revenue in query.group_by(DailySalesRollup.date).all():
+            totals[_as_date(row_day)][0] += order_count or 0
+            totals[_as_date(row_day)][1] += revenue or 0
+
+    day = func.date(Order.created_at)
+    for range_start, range_end, inclusive in raw_ranges:
+        rows = (
+            _raw_paid_orders(db, (day, func.count(Order.id), func.sum(Order.total_amount)), range_start, range_end, inclusive)
+            .group_by(day)
+            .all()
+        )
+        for row_day, order_count, revenue in rows:
+            totals[_as_date(row_day)][0] += order_count or 0
+            totals[_as_date(row_day)][1] += revenue or 0
+
+    return {row_day: (order_count, revenue) for row_day, (order_count, revenue) in totals.items()}
+
+
+def paid_sales_summary(db: Session, start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, float]:
+    """
+    Paid order count and revenue for orders placed in [start, end]
+    """
+    start, end = _as_utc_naive(start), _as_utc_naive(end)
+    order_count, revenue = 0, 0.0
+
+    if is_covered(db):
+        first_day, last_day, raw_ranges = _plan(start, end)
+    else:
+        first_day, last_day, raw_ranges = None, None, [(start, end, True)]
+
+    if last_day is not None:
+        query = (
+            db.query(func.sum(DailySalesRollup.order_count), func.sum(DailySalesRollup.revenue))
+            .filter(DailySalesRollup.dish_id.is_(None))
+            .filter(DailySalesRollup.date <= last_day)
+        )
+        if first_day is not None:
+            query = query.filter(DailySalesRollup.date >= first_day)
+        rollup_count, rollup_revenue = query.one()
+        order_count += rollup_count or 0
+        revenue += rollup_revenue or 0
+
+    for range_start, range_end, inclusive in raw_ranges:
+        raw_count, raw_revenue = _raw_paid_orders(
+            db, (func.count(Order.id), func.sum(Order.total_amount)), range_start, range_end, inclusive
+        ).one()
+        order_count += raw_count or 0
+        revenue += raw_revenue or 0
+
+    return order_count, revenue
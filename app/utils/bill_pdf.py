@@ -0,0 +1,255 @@
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from io import BytesIO
+import threading
+
+# ReportLab layout of the printed bill. pdf_generator imports this module on
+# the first render, so only processes that render bills load ReportLab.
+
+# Receipt page layout
+PAGE_SIZE = (4*inch, 11*inch)  # Typical receipt width
+MARGIN = 10
+CONTENT_WIDTH = PAGE_SIZE[0] - 2 * MARGIN
+ITEM_COL_WIDTHS = [CONTENT_WIDTH*0.4, CONTENT_WIDTH*0.15, CONTENT_WIDTH*0.2, CONTENT_WIDTH*0.25]
+
+
+def _build_styles():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='HotelName',
+        fontName='Helvetica-Bold',
+        fontSize=14,
+        alignment=1,  # Center alignment
+        spaceAfter=2
+    ))
+    styles.add(ParagraphStyle(
+        name='HotelTagline',
+        fontName='Helvetica',
+        fontSize=9,
+        alignment=1,  # Center alignment
+        spaceAfter=2
+    ))
+    styles.add(ParagraphStyle(
+        name='HotelAddress',
+        fontName='Helvetica',
+        fontSize=8,
+        alignment=1,  # Center alignment
+        spaceAfter=1
+    ))
+    styles.add(ParagraphStyle(
+        name='BillInfo',
+        fontName='Helvetica',
+        fontSize=8,
+        alignment=0,  # Left alignment
+        spaceAfter=1
+    ))
+    styles.add(ParagraphStyle(
+        name='BillInfoRight',
+        fontName='Helvetica',
+        fontSize=8,
+        alignment=2,  # Right alignment
+        spaceAfter=1
+    ))
+    styles.add(ParagraphStyle(
+        name='TableHeader',
+        fontName='Helvetica-Bold',
+        fontSize=8,
+        alignment=0
+    ))
+    styles.add(ParagraphStyle(
+        name='ItemName',
+        fontName='Helvetica',
+        fontSize=8,
+        alignment=0
+    ))
+    styles.add(ParagraphStyle(
+        name='ItemValue',
+        fontName='Helvetica',
+        fontSize=8,
+        alignment=2  # Right alignment
+    ))
+    styles.add(ParagraphStyle(
+        name='Total',
+        fontName='Helvetica-Bold',
+        fontSize=9,
+        alignment=1  # Center alignment
+    ))
+    styles.add(ParagraphStyle(
+        name='Footer',
+        fontName='Helvetica',
+        fontSize=7,
+        alignment=1,  # Center alignment
+        textColor=colors.black
+    ))
+    return styles
+
+
+# Styles never change, so they are built once per process
+STYLES = _build_styles()
+
+BILL_INFO_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 8),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('LINEBELOW', (0, 0), (1, 0), 0.5, colors.black),
+])
+ITEMS_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 8),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+])
+TOTALS_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 8),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+])
+
+
+def _separator():
+    return Paragraph("_" * 50, STYLES['HotelAddress'])
+
+
+class _BillTemplate:
+    """
+    The parts of a bill that only depend on the hotel settings
+
+    Flowables keep layout state while a document is built, so a template is
+    only used by one thread at a time (see _get_template).
+    """
+
+    def __init__(self, header):
+        hotel_name, address, contact_number, tax_id = header
+
+        # We're not using the logo in this receipt-style bill
+        self.header = [
+            Paragraph(hotel_name.upper(), STYLES['HotelName']),
+            Paragraph("AN AUTHENTIC CUISINE SINCE 2000", STYLES['HotelTagline']),
+        ]
+        if address:
+            self.header.append(Paragraph(address, STYLES['HotelAddress']))
+        if contact_number:
+            self.header.append(Paragraph(f"Contact: {contact_number}", STYLES['HotelAddress']))
+        if tax_id:
+            self.header.append(Paragraph(f"GSTIN: {tax_id}", STYLES['HotelAddress']))
+        self.header.append(_separator())
+
+        self.separator = _separator()
+
+        items_header_table = Table([["Item", "Qty.", "Price", "Amount"]], colWidths=ITEM_COL_WIDTHS)
+        items_header_table.setStyle(TableStyle([
+            ('FONT', (0, 0), (-1, -1), 'Helvetica-Bold', 8),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+        ]))
+        self.items_header = items_header_table
+
+        self.footer = [
+            Spacer(1, 5),
+            Paragraph("FSSAI Lic No: 12018033000205", STYLES['Footer']),
+            Paragraph("!!! Thank You !!! Visit Again !!!", STYLES['Footer']),
+        ]
+
+
+# Templates per thread, keyed by the settings header fields. A settings change
+# produces a new key; old templates are dropped once the cache is full.
+_templates = threading.local()
+_TEMPLATE_CACHE_SIZE = 8
+
+
+def _get_template(header) -> _BillTemplate:
+    cache = getattr(_templates, "cache", None)
+    if cache is None:
+        cache = _templates.cache = {}
+    template = cache.get(header)
+    if template is None:
+        if len(cache) >= _TEMPLATE_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        template = cache[header] = _BillTemplate(header)
+    return template
+
+
+def render_bill(data: dict) -> bytes:
+    """
+    Render a bill from bill_data() output
+
+    Returns:
+        bytes: The PDF document
+    """
+    template = _get_template(data["header"])
+
+    buffer = BytesIO()
+    # Use a narrower page size to mimic a receipt
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=PAGE_SIZE,
+        rightMargin=MARGIN,
+        leftMargin=MARGIN,
+        topMargin=MARGIN,
+        bottomMargin=MARGIN
+    )
+
+    elements = list(template.header)
+
+    # Create a table for the bill header info
+    printed_at = data["printed_at"]
+    bill_info_data = [
+        ["Name:", data["customer_name"]],
+        [f"Date: {printed_at.strftime('%d/%m/%y')}", f"Dine In: {data['table_number']}"],
+        [f"{printed_at.strftime('%H:%M')}", f"Bill No.: {data['bill_number']}"]
+    ]
+    bill_info_table = Table(bill_info_data, colWidths=[CONTENT_WIDTH/2-20, CONTENT_WIDTH/2-20])
+    bill_info_table.setStyle(BILL_INFO_STYLE)
+    elements.append(bill_info_table)
+    elements.append(template.separator)
+
+    elements.append(template.items_header)
+
+    # Add all order items, one table per order
+    total_items = 0
+    grand_total = 0
+
+    for rows in data["items"]:
+        order_data = []
+        for dish_name, quantity, price in rows:
+            total = price * quantity
+            grand_total += total
+            total_items += quantity
+            order_data.append([dish_name, str(quantity), f"{price:.2f}", f"{total:.2f}"])
+
+        if order_data:
+            items_table = Table(order_data, colWidths=ITEM_COL_WIDTHS)
+            items_table.setStyle(ITEMS_STYLE)
+            elements.append(items_table)
+
+    elements.append(template.separator)
+
+    # Add totals section
+    # Calculate tax (assuming 5% CGST and 5% SGST like in the image)
+    tax_rate = 0.05  # 5%
+    cgst = grand_total * tax_rate
+    sgst = grand_total * tax_rate
+    subtotal = grand_total - cgst - sgst
+
+    totals_data = [
+        [f"Total Qty: {total_items}", "Sub Total", f"{subtotal:.2f}"],
+        ["", "CGST", f"{cgst:.2f}"],
+        ["", "SGST", f"{sgst:.2f}"],
+    ]
+    totals_table = Table(totals_data, colWidths=[CONTENT_WIDTH*0.4, CONTENT_WIDTH*0.35, CONTENT_WIDTH*0.25])
+    totals_table.setStyle(TOTALS_STYLE)
+    elements.append(totals_table)
+
+    # Add grand total with emphasis
+    elements.append(template.separator)
+    elements.append(Paragraph(f"Grand Total    ₹{grand_total:.2f}", STYLES['Total']))
+    elements.append(template.separator)
+
+    # Add license info and thank you message
+    elements.extend(template.footer)
+
+    doc.build(elements)
+    return buffer.getvalue()
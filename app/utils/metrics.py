@@ -0,0 +1,191 @@
+from bisect import bisect_left
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Tuple
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Route label for requests that matched no route, so scanners probing random
+# paths can't create unbounded label sets
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """
+    Bucket counts, sum and count of observed values. Not locked itself; the
+    owning registry serialises access.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; counts are cumulated when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return list(self.counts), self.sum, self.count
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _render_histogram(lines: list, name: str, labels: str, histogram: Histogram):
+    counts, total, count = histogram.snapshot()
+    separator = "," if labels else ""
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.buckets, counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {count}')
+    lines.append(f"{name}_sum{{{labels}}} {total}")
+    lines.append(f"{name}_count{{{labels}}} {count}")
+
+
+class MetricsRegistry:
+    """
+    Process-wide request and database metrics, rendered in the Prometheus
+    text format
+
+    Each observation takes one short lock, so recording is cheap enough for
+    every request. With several worker processes each worker reports its own
+    numbers; Prometheus sums them across scrape targets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._durations: Dict[Tuple[str, str], Histogram] = {}
+        self._in_flight = 0
+        self._db_checkouts: Dict[str, Histogram] = {}
+
+    def request_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, duration: float):
+        with self._lock:
+            self._in_flight -= 1
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._durations.get((method, route))
+            if histogram is None:
+                histogram = self._durations[(method, route)] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(duration)
+
+    def observe_db_checkout(self, pool: str, duration: float):
+        with self._lock:
+            histogram = self._db_checkouts.get(pool)
+            if histogram is None:
+                histogram = self._db_checkouts[pool] = Histogram(DB_CHECKOUT_BUCKETS)
+            histogram.observe(duration)
+
+    def render(self) -> str:
+        """
+        Current values in the Prometheus text exposition format
+        """
+        with self._lock:
+            requests = dict(self._requests)
+            in_flight = self._in_flight
+            durations = {key: _copy(histogram) for key, histogram in self._durations.items()}
+            db_checkouts = {key: _copy(histogram) for key, histogram in self._db_checkouts.items()}
+
+        lines = [
+            "# HELP tabble_http_requests_total HTTP requests by route and status code.",
+            "# TYPE tabble_http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f"tabble_http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}")
+
+        lines += [
+            "# HELP tabble_http_requests_in_flight HTTP requests currently being served.",
+            "# TYPE tabble_http_requests_in_flight gauge",
+            f"tabble_http_requests_in_flight {in_flight}",
+            "# HELP tabble_http_request_duration_seconds Time from receiving a request to sending the last byte.",
+            "# TYPE tabble_http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(durations.items()):
+            _render_histogram(lines, "tabble_http_request_duration_seconds", _labels(method=method, route=route), histogram)
+
+        lines += [
+            "# HELP tabble_db_pool_checkout_seconds Time to get a connection from the database pool.",
+            "# TYPE tabble_db_pool_checkout_seconds histogram",
+        ]
+        for pool, histogram in sorted(db_checkouts.items()):
+            _render_histogram(lines, "tabble_db_pool_checkout_seconds", _labels(pool=pool), histogram)
+
+        return "\n".join(lines) + "\n"
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    copy = Histogram(histogram.buckets)
+    copy.counts, copy.sum, copy.count = histogram.snapshot()
+    return copy
+
+
+def _route_label(scope: Scope, root_path: str) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (static files, the React build) set an endpoint but no
+    # route; label them by their mount prefix
+    if "endpoint" in scope:
+        return scope.get("root_path", "")[len(root_path):] + "/*"
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the count, duration and status code of every
+    HTTP request, labelled by route template (e.g. /admin/orders/{order_id})
+    rather than by raw path
+    """
+
+    def __init__(self, app: ASGIApp, registry: "MetricsRegistry" = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        root_path = scope.get("root_path", "")
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.request_finished(
+                scope["method"],
+                _route_label(scope, root_path),
+                status,
+                time.perf_counter() - start,
+            )
+
+
+# Shared by the middleware, the database pools and the /metrics endpoint
+metrics = MetricsRegistry()
@@ -0,0 +1,175 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+import os
+import threading
+import time
+
+# Set DB_QUERY_COUNTER=0 to leave the engines uninstrumented; the hooks add
+# roughly 20 us per statement
+DB_QUERY_COUNTER = os.getenv("DB_QUERY_COUNTER", "1") == "1"
+# The same statement run this many times in one request is reported as a
+# suspected N+1 query
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+# Set DB_QUERY_LOG=1 to log the query count of every request, not only the
+# suspicious ones
+DB_QUERY_LOG = os.getenv("DB_QUERY_LOG", "0") == "1"
+
+
+class QueryStats:
+    """
+    Statements executed during one request (or one assert_max_queries
+    block), with their total time and how often each statement ran
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, duration: float):
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        """
+        Statements that ran at least threshold times, most frequent first.
+        Parameters are bound separately, so a loop issuing one query per row
+        shows up as a single statement with a high count.
+        """
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+# Stats of the request being handled. Sync endpoints and dependencies run on
+# the threadpool with a copy of the request's context, so they share the
+# same QueryStats object.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Blocks of assert_max_queries currently counting every statement, whatever
+# thread or request it belongs to
+_global_stats = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()[1]
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    for stats in _global_stats:
+        stats.record(statement, duration)
+
+
+def _handle_error(exception_context):
+    # A statement the driver rejects never reaches after_cursor_execute; drop
+    # its start time so it doesn't pile up on the pooled connection. Errors
+    # raised before the cursor ran, or after it finished, left nothing behind.
+    connection = exception_context.connection
+    if connection is None:
+        return
+    started = connection.info.get("query_start")
+    if started and started[-1][0] is exception_context.execution_context:
+        started.pop()
+
+
+def instrument_engine(engine):
+    """
+    Count the statements run on a (sync) engine; pass async_engine.sync_engine
+    for an async engine
+    """
+    if not DB_QUERY_COUNTER:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _shorten(statement: str, length: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+
+class QueryCounterMiddleware:
+    """
+    ASGI middleware counting the SQL statements each request runs
+
+    The count and total SQL time are added to the response as X-DB-Queries
+    and Server-Timing (shown in the browser's network panel). Statements
+    repeated N_PLUS_ONE_THRESHOLD times or more are logged as suspected N+1
+    queries. Statements of a streaming response that run after its headers
+    were sent are still counted in the log line.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            _log_request(scope, stats)
+
+
+def _log_request(scope: Scope, stats: QueryStats):
+    request = f"{scope['method']} {scope['path']}"
+    if DB_QUERY_LOG and stats.count:
+        print(f"{request}: {stats.count} queries in {stats.duration * 1000:.1f} ms")
+    for statement, count in stats.repeated():
+        print(f"Suspected N+1 query in {request}: ran {count} times: {_shorten(statement)}")
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Fail if the block runs more than max_queries SQL statements, e.g.
+
+        with assert_max_queries(3):
+            client.get("/admin/orders")
+
+    Every statement on an instrumented engine counts, including ones run by
+    the app in TestClient's thread, so don't run other database work
+    concurrently with the block.
+
+    Raises:
+        AssertionError: With the statements run, most frequent first
+    """
+    stats = QueryStats()
+    _global_stats.append(stats)
+    try:
+        yield stats
+    finally:
+        _global_stats.remove(stats)
+
+    if stats.count > max_queries:
+        details = "\n".join(
+            f"  {count}x {_shorten(statement)}" for statement, count in stats.statements.most_common()
+        )
+        raise AssertionError(f"Expected at most {max_queries} queries, ran {stats.count}:\n{details}")
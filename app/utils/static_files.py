@@ -0,0 +1,97 @@
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+import mimetypes
+import os
+import re
+
+# File names carrying a content hash; their content never changes, so
+# browsers may cache them indefinitely. Only the two naming schemes that
+# produce them match, so a dated name like "menu_20240101.pdf" doesn't:
+# - the React build's "<name>.<hash>.<ext>", e.g. "main.3f2a1b9c.js"; a run
+#   of digits alone is more likely a date or version than a hash
+# - uploads named by images.save_upload after the first 16 hex digits of
+#   their SHA-256, and their variants, e.g. "dish_9f86d081884c7d65_thumb.webp"
+HASHED_NAME = re.compile(
+    r"^[^.]+\.(?=[0-9]*[a-f])[0-9a-f]{8,}\."
+    r"|^(?:dish|hotel_logo)_[0-9a-f]{16}[._]"
+)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else is revalidated with its ETag on each use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Precompressed siblings written by compress_static.py, in order of preference
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def is_hashed_name(path: str) -> bool:
+    return HASHED_NAME.search(os.path.basename(path)) is not None
+
+
+def _accepted_encodings(request_headers: Headers) -> set:
+    encodings = set()
+    for part in request_headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(token.strip().lower())
+    return encodings
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with Cache-Control headers and precompressed variants
+
+    Hashed file names are served as immutable for a year, all other files
+    must be revalidated. When "app.js.br" or "app.js.gz" exists next to
+    "app.js", is not older than it and the client accepts that encoding, the
+    compressed file is sent instead.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+
+        path, encoding, has_variants = full_path, None, False
+        accepted = _accepted_encodings(request_headers)
+        source_mtime = stat_result.st_mtime
+        for name, suffix in PRECOMPRESSED:
+            try:
+                variant_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            # A variant older than the file was compressed from a previous
+            # version of it
+            if variant_stat.st_mtime < source_mtime:
+                continue
+            has_variants = True
+            if encoding is None and name in accepted:
+                path, encoding, stat_result = f"{full_path}{suffix}", name, variant_stat
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            method=scope["method"],
+            media_type=media_type,
+        )
+        if encoding is not None:
+            response.headers["content-encoding"] = encoding
+        if has_variants:
+            response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = (
+            IMMUTABLE_CACHE_CONTROL if is_hashed_name(str(full_path)) else REVALIDATE_CACHE_CONTROL
+        )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
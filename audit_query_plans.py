@@ -0,0 +1,342 @@
+import argparse
+import os
+import random
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+# The audit seeds its own SQLite database; point the app's engines at it
+# before anything from app is imported
+AUDIT_DATABASE_URL = os.getenv("AUDIT_DATABASE_URL", "sqlite:///./query_plan_audit.db")
+os.environ["DATABASE_URL"] = AUDIT_DATABASE_URL
+os.environ.pop("ANALYTICS_DATABASE_URL", None)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+# Bills rendered by the audited requests
+os.environ["BILL_CACHE_DIR"] = "query_plan_audit_bills"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func
+
+from app.database import (
+    engine, read_engine, async_engine, SessionLocal,
+    Dish, Feedback, LoyaltyProgram, Order, OrderItem, Person, SelectionOffer, Table,
+)
+from app.migrations import upgrade
+from app.services import sales_rollup
+
+# Tables that grow with every order; a full scan of any of them in a hot
+# query fails the audit
+HOT_TABLES = {"orders", "order_items", "feedback", "persons"}
+
+SEED_BATCH_SIZE = 20000
+STATUSES = ["paid"] * 90 + ["completed"] * 5 + ["pending"] * 3 + ["payment_requested"] * 2
+HISTORY_DAYS = 730
+TABLE_COUNT = 30
+
+# Rows returned to the app per statement while auditing
+AUDIT_ROW_CAP = 100
+
+
+def seed(order_count: int):
+    """
+    Fill the audit database with order_count orders (about three items each)
+    over the last HISTORY_DAYS days, proportional customers and feedback, and
+    the tables, loyalty tiers and offers the order screens read
+    """
+    rng = random.Random(1)
+    history_start = datetime.combine(datetime.now().date(), time.min) - timedelta(days=HISTORY_DAYS)
+    person_count = max(1, order_count // 20)
+    dish_count = 60
+
+    with engine.begin() as connection:
+        connection.execute(Dish.__table__.insert(), [
+            {
+                "name": f"Dish {i}",
+                "category": f"Category {i % 6}",
+                "price": 5 + i % 20,
+                "quantity": 100,
+                "is_offer": int(i % 10 == 0),
+                "is_special": int(i % 15 == 0),
+            }
+            for i in range(1, dish_count + 1)
+        ])
+        connection.execute(Person.__table__.insert(), [
+            {"username": f"customer{i}", "password": "x", "phone_number": f"+1555{i:07d}", "visit_count": 1}
+            for i in range(1, person_count + 1)
+        ])
+        connection.execute(Table.__table__.insert(), [
+            {"table_number": i, "is_occupied": False} for i in range(1, TABLE_COUNT + 1)
+        ])
+        connection.execute(LoyaltyProgram.__table__.insert(), [
+            {"visit_count": visits, "discount_percentage": discount, "is_active": True}
+            for visits, discount in ((3, 5.0), (5, 10.0), (10, 15.0))
+        ])
+        connection.execute(SelectionOffer.__table__.insert(), [
+            {"min_amount": amount, "discount_amount": discount, "is_active": True}
+            for amount, discount in ((300.0, 20.0), (500.0, 50.0))
+        ])
+
+    print(f"Seeding {order_count} orders...")
+    order_id = 0
+    item_id = 0
+    for start in range(0, order_count, SEED_BATCH_SIZE):
+        orders, items, feedback = [], [], []
+        for _ in range(min(SEED_BATCH_SIZE, order_count - start)):
+            order_id += 1
+            created_at = history_start + timedelta(minutes=order_id * HISTORY_DAYS * 1440 // order_count)
+            person_id = rng.randint(1, person_count) if rng.random() < 0.7 else None
+            orders.append({
+                "id": order_id,
+                "table_number": rng.randint(1, TABLE_COUNT),
+                "unique_id": f"u{order_id}",
+                "person_id": person_id,
+                "status": rng.choice(STATUSES),
+                "total_amount": 0,
+                "item_count": 3,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+            for _ in range(3):
+                item_id += 1
+                items.append({
+                    "id": item_id,
+                    "order_id": order_id,
+                    "dish_id": rng.randint(1, dish_count),
+                    "quantity": rng.randint(1, 3),
+                    "unit_price": 10.0,
+                    "created_at": created_at,
+                })
+            if rng.random() < 0.1:
+                feedback.append({
+                    "order_id": order_id,
+                    "person_id": person_id,
+                    "rating": rng.randint(1, 5),
+                    "comment": "Good",
+                    "created_at": created_at,
+                })
+        with engine.begin() as connection:
+            connection.execute(Order.__table__.insert(), orders)
+            connection.execute(OrderItem.__table__.insert(), items)
+            if feedback:
+                connection.execute(Feedback.__table__.insert(), feedback)
+
+    print("Rebuilding the daily sales rollup...")
+    db = SessionLocal()
+    try:
+        sales_rollup.rebuild(db)
+    finally:
+        db.close()
+
+    # Give the planner real row counts, as a long-running database has
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+
+def hot_requests(db):
+    """
+    (router, description, method, path, query parameters or JSON body, tables
+    allowed to be scanned) for the requests behind the app's screens. Their
+    SQL comes from the routers and services themselves, so the audit follows
+    any change to how a router builds its queries.
+    """
+    # Real rows to look up
+    history_end = db.query(func.max(Order.created_at)).scalar()
+    since = (history_end - timedelta(days=30)).isoformat()
+    until = history_end.isoformat()
+    last_hour = (history_end - timedelta(hours=1)).isoformat()
+    in_range = {"start_date": since, "end_date": until}
+    order_id = db.query(func.max(Order.id)).scalar() // 2
+    feedback_order_id = db.query(Feedback.order_id).filter(Feedback.order_id >= order_id).limit(1).scalar()
+    person = db.query(Person).filter(Person.id == max(1, db.query(func.max(Person.id)).scalar() // 2)).one()
+    dish_id = db.query(Dish.id).limit(1).scalar()
+
+    return [
+        ("admin", "orders by status", "GET", "/admin/orders", {"status": "pending"}, set()),
+        ("admin", "orders by table", "GET", "/admin/orders", {"table_number": 7, "limit": 50}, set()),
+        ("admin", "orders by customer", "GET", "/admin/orders", {"person_id": person.id}, set()),
+        ("admin", "orders in date range", "GET", "/admin/orders", in_range, set()),
+        ("admin", "order page", "GET", "/admin/orders", {"limit": 50}, set()),
+        ("admin", "order bill", "GET", f"/admin/orders/{order_id}/bill", None, set()),
+        ("admin", "multi-order bill", "POST", "/admin/orders/multi-bill", [order_id, order_id + 1, order_id + 2], set()),
+        ("admin", "bill export", "GET", "/admin/orders/bills/export", {"start_date": last_hour, "end_date": until}, set()),
+        ("chef", "pending orders", "GET", "/chef/orders/pending", None, set()),
+        ("customer", "menu", "GET", "/customer/api/menu", None, set()),
+        ("customer", "offer dishes", "GET", "/customer/api/offers", None, set()),
+        ("customer", "order status", "GET", f"/customer/api/orders/{order_id}", None, set()),
+        ("customer", "customer's orders", "GET", f"/customer/api/person/{person.id}/orders", None, set()),
+        ("customer", "login", "POST", "/customer/api/login", {"username": person.username, "password": "x", "table_number": 7}, set()),
+        ("customer", "phone login", "POST", "/customer/api/verify-otp", {"phone_number": person.phone_number, "verification_code": "123456", "table_number": 7}, set()),
+        ("customer", "place order", "POST", "/customer/api/orders", {"table_number": 7, "unique_id": "audit", "username": person.username, "password": "x", "items": [{"dish_id": dish_id, "quantity": 1}]}, set()),
+        ("feedback", "feedback for order", "GET", f"/feedback/order/{feedback_order_id}", None, set()),
+        ("feedback", "feedback by customer", "GET", f"/feedback/person/{person.id}", None, set()),
+        ("loyalty", "active tiers", "GET", "/loyalty/active", None, set()),
+        ("loyalty", "discount for visit count", "GET", "/loyalty/discount/7", None, set()),
+        ("selection_offer", "active offers", "GET", "/selection-offers/active", None, set()),
+        ("selection_offer", "discount for order amount", "GET", "/selection-offers/discount/450", None, set()),
+        ("table", "tables", "GET", "/tables/", None, set()),
+        ("table", "table by number", "GET", "/tables/number/7", None, set()),
+        ("table", "table status summary", "GET", "/tables/status/summary", None, set()),
+        ("analytics", "dashboard", "GET", "/analytics/dashboard", in_range, set()),
+        ("analytics", "sales over time", "GET", "/analytics/sales-over-time", {"days": 30}, set()),
+        ("analytics", "chef performance", "GET", "/analytics/chef-performance", {"days": 30}, set()),
+        ("analytics", "customer frequency", "GET", "/analytics/customer-frequency", in_range, set()),
+        ("analytics", "feedback analysis", "GET", "/analytics/feedback-analysis", in_range, set()),
+        # Aggregates over the whole history; they are cached (the order stats
+        # in memory, the others by the analytics router) and expected to read
+        # every order
+        ("admin", "order stats", "GET", "/admin/stats/orders", None, {"orders"}),
+        ("analytics", "top dishes (all history)", "GET", "/analytics/top-dishes", None, {"orders", "order_items"}),
+        ("analytics", "top customers (all history)", "GET", "/analytics/top-customers", None, {"orders", "persons"}),
+        ("analytics", "sales by category (all history)", "GET", "/analytics/sales-by-category", None, {"orders", "order_items"}),
+        ("analytics", "table utilization (all history)", "GET", "/analytics/table-utilization", None, {"orders"}),
+    ]
+
+
+class StatementRecorder:
+    """
+    Records the SELECT statements the app runs, with their bound parameters,
+    while a recording is active
+
+    Each recorded statement is sent as "SELECT * FROM (<statement>) LIMIT
+    AUDIT_ROW_CAP", so list endpoints don't load the whole seeded history;
+    the plans are taken from the statements as the app built them.
+    """
+
+    def __init__(self):
+        self.statements = None
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.statements is None or not statement.lstrip().upper().startswith("SELECT"):
+            return statement, parameters
+        self.statements.append((statement, parameters))
+        return f"SELECT * FROM ({statement}) LIMIT {AUDIT_ROW_CAP}", parameters
+
+    @contextmanager
+    def recording(self):
+        self.statements = []
+        try:
+            yield self.statements
+        finally:
+            self.statements = None
+
+
+def query_plan(statement: str, parameters) -> list:
+    # Explain on a raw connection, outside the recorder
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+def full_scans(plan: list, limited: bool = False) -> set:
+    """
+    Hot tables the plan reads from start to end. "SCAN t USING INDEX i" also
+    counts, unless the statement has a LIMIT: SQLite then walks the index in
+    the requested order and stops after the page.
+    """
+    tables = set()
+    for detail in plan:
+        if not detail.startswith("SCAN ") or (limited and " INDEX " in detail):
+            continue
+        name = detail.split()[1]
+        # ORM aliases such as persons_1
+        table = name.rsplit("_", 1)[0] if name.rsplit("_", 1)[-1].isdigit() else name
+        if table in HOT_TABLES:
+            tables.add(table)
+    return tables
+
+
+def _shorten(statement: str, length: int = 120) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+
+def audit() -> int:
+    # app.main refuses to import against a database with pending migrations
+    from app.main import app
+
+    recorder = StatementRecorder()
+    for recorded_engine in {engine, read_engine, async_engine.sync_engine}:
+        event.listen(recorded_engine, "before_cursor_execute", recorder.before_cursor_execute, retval=True)
+
+    db = SessionLocal()
+    try:
+        requests = hot_requests(db)
+    finally:
+        db.close()
+
+    failures = 0
+    with TestClient(app) as client:
+        for router, description, method, path, payload, allowed in requests:
+            with recorder.recording() as statements:
+                if method == "GET":
+                    response = client.get(path, params=payload)
+                else:
+                    response = client.request(method, path, json=payload)
+
+            problems = []
+            if response.status_code >= 400:
+                problems.append(f"HTTP {response.status_code}")
+            plans = []
+            seen = set()
+            for statement, parameters in statements:
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                plan = query_plan(statement, parameters)
+                limited = re.search(r"\bLIMIT\b", statement, re.IGNORECASE) is not None
+                scans = full_scans(plan, limited) - allowed
+                if scans:
+                    problems.append(f"FULL SCAN of {', '.join(sorted(scans))}")
+                plans.append((statement, plan))
+
+            failures += bool(problems)
+            status = "; ".join(problems) if problems else "ok"
+            print(f"[{status}] {router}: {description} ({method} {path})")
+            for statement, plan in plans:
+                print(f"    {_shorten(statement)}")
+                for detail in plan:
+                    print(f"      {detail}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the routers' hot queries use indexes")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="orders to seed (default 1,000,000)")
+    parser.add_argument("--reseed", action="store_true", help="delete and reseed an existing audit database")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "sqlite":
+        print("The audit reads SQLite's EXPLAIN QUERY PLAN; point AUDIT_DATABASE_URL at a SQLite file")
+        return 2
+
+    database_path = engine.url.database
+    if args.reseed and os.path.exists(database_path):
+        engine.dispose()
+        os.remove(database_path)
+
+    upgrade()
+    db = SessionLocal()
+    try:
+        seeded = db.query(func.count(Order.id)).scalar()
+    finally:
+        db.close()
+    if not seeded:
+        seed(args.rows)
+    else:
+        print(f"Using existing audit database with {seeded} orders (--reseed to rebuild)")
+
+    failures = audit()
+    if failures:
+        print(f"{failures} hot requests fall back to a full table scan or failed")
+        return 1
+    print("All hot requests use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SETTINGS = SimpleNamespace(
+    hotel_name="Tabble Hotel",
+    address="12 Market Road, Bengaluru",
+    contact_number="+91 98765 43210",
+    tax_id="29ABCDE1234F1Z5",
+)
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)]
+
+
+def create_schema():
+    try:
+        from app.migrations import upgrade
+    except ImportError:
+        # Trees from before versioned migrations
+        from app.database import create_tables as upgrade
+    upgrade()
+
+
+def seed_orders(item_counts: list) -> dict:
+    """
+    One order per item count, loaded with its items and dishes
+
+    Returns:
+        dict: Item count -> detached order
+    """
+    from app.database import SessionLocal, Dish, Order, OrderItem
+
+    db = SessionLocal()
+    try:
+        dishes = [Dish(name=f"Dish number {i}", category="Main", price=100 + i, quantity=100) for i in range(100)]
+        db.add_all(dishes)
+        db.flush()
+        order_ids = {}
+        for count in item_counts:
+            order = Order(table_number=4, unique_id="bench", status="completed")
+            db.add(order)
+            db.flush()
+            db.add_all([
+                OrderItem(order_id=order.id, dish_id=dishes[i % len(dishes)].id, quantity=1 + i % 3)
+                for i in range(count)
+            ])
+            order_ids[count] = order.id
+        db.commit()
+
+        orders = {}
+        for count, order_id in order_ids.items():
+            order = db.get(Order, order_id)
+            # Load everything the bill reads, so renders run no queries
+            for item in order.items:
+                item.dish.name
+            orders[count] = order
+        return orders
+    finally:
+        db.close()
+
+
+def measure_stall(stop: threading.Event, delays: list):
+    # How late a thread that wants to run every millisecond wakes up, i.e.
+    # how long other requests would wait while bills render
+    while not stop.is_set():
+        start = time.perf_counter()
+        time.sleep(0.001)
+        delays.append((time.perf_counter() - start - 0.001) * 1000)
+
+
+def run_case(render, order, threads: int, bills: int):
+    latencies = []
+
+    def render_one(_):
+        start = time.perf_counter()
+        render([order], SETTINGS)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    stop, delays = threading.Event(), []
+    watcher = threading.Thread(target=measure_stall, args=(stop, delays))
+    watcher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(render_one, range(bills)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    watcher.join()
+    return bills / elapsed, percentile(latencies, 0.99), percentile(delays, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bills per second and p99 latency of bill PDF rendering")
+    parser.add_argument("--items", default="1,10,100", help="items per bill, comma separated")
+    parser.add_argument("--threads", default="1,8", help="concurrent request threads, comma separated")
+    parser.add_argument("--bills", type=int, default=200, help="bills rendered per case")
+    parser.add_argument("--workers", type=int, help="BILL_RENDER_WORKERS (default: the app's default)")
+    parser.add_argument(
+        "--tree", default=PROJECT_DIR,
+        help="source tree to benchmark, e.g. a checkout from before the render pool",
+    )
+    args = parser.parse_args()
+    item_counts = [int(value) for value in args.items.split(",")]
+    thread_counts = [int(value) for value in args.threads.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        if args.workers is not None:
+            os.environ["BILL_RENDER_WORKERS"] = str(args.workers)
+        sys.path.insert(0, args.tree)
+        os.chdir(args.tree)
+
+        create_schema()
+        orders = seed_orders(item_counts)
+
+        from app.utils import pdf_generator
+
+        render = pdf_generator.generate_multi_order_bill_pdf
+        # Start the render pool (where there is one) before timing
+        render([orders[item_counts[0]]], SETTINGS)
+
+        print(f"{args.bills} bills per case against {args.tree}")
+        print("  items  threads  bills/s  p99 latency  p99 stall")
+        for count in item_counts:
+            for threads in thread_counts:
+                rate, p99, stall = run_case(render, orders[count], threads, args.bills)
+                print(f"  {count:5}  {threads:7}  {rate:7.0f}  {p99:8.1f} ms  {stall:6.1f} ms")
+    # The render pool, where there is one, is joined at interpreter exit
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Needs httpx (pip install httpx), which FastAPI's TestClient also uses
+import httpx
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Request mix per client, repeated: one order, one customer history, one
+# menu and two order lookups
+MIX = ["create_order", "person_orders", "menu", "get_order", "get_order"]
+
+
+def percentile(values: list, fraction: float) -> float:
+    return values[max(0, int(len(values) * fraction) - 1)]
+
+
+async def run_client(client, number: int, requests: int, dish_ids: list, latencies: dict, errors: list):
+    for index in range(requests):
+        kind = MIX[index % len(MIX)]
+        start = time.perf_counter()
+        try:
+            if kind == "create_order":
+                response = await client.post("/customer/api/orders", json={
+                    "table_number": 1 + number % 10,
+                    "unique_id": "bench",
+                    "items": [{"dish_id": random.choice(dish_ids), "quantity": 1}],
+                })
+            elif kind == "person_orders":
+                response = await client.get("/customer/api/person/1/orders")
+            elif kind == "menu":
+                response = await client.get("/customer/api/menu")
+            else:
+                response = await client.get(f"/customer/api/orders/{random.randint(1, 50)}")
+        except httpx.TransportError as error:
+            errors.append(type(error).__name__)
+            continue
+        latencies.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+        if response.status_code not in (200, 404):
+            errors.append(str(response.status_code))
+
+
+async def load(base_url: str, clients: int, requests: int):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        dish_ids = [dish["id"] for dish in (await client.get("/customer/api/menu")).json()]
+        latencies, errors = {}, []
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            run_client(client, number, requests, dish_ids, latencies, errors) for number in range(clients)
+        ])
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("The server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/customer/api/menu", timeout=2).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("The server did not start in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="p50/p99 latency of the customer endpoints under concurrent clients"
+    )
+    parser.add_argument("--clients", type=int, default=500, help="concurrent clients (default 500)")
+    parser.add_argument("--requests", type=int, default=10, help="requests per client (default 10)")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument(
+        "--tree", default=PROJECT_DIR,
+        help="source tree to serve, e.g. a checkout from before the async endpoints for the sync numbers",
+    )
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory() as directory:
+        # A fresh database with the sample menu, so runs are comparable
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}", PYTHONPATH=args.tree)
+        env.pop("ASYNC_DATABASE_URL", None)
+        subprocess.run([sys.executable, "init_db.py"], cwd=args.tree, env=env, check=True, capture_output=True)
+
+        # One uvicorn worker, as the numbers compare how one process copes
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+             "--log-level", "warning", "--timeout-keep-alive", "120", "--backlog", "4096"],
+            cwd=args.tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(base_url, server)
+            latencies, errors, elapsed = asyncio.run(load(base_url, args.clients, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+    everything = sorted(value for values in latencies.values() for value in values)
+    print(f"{args.clients} clients x {args.requests} requests against {args.tree}")
+    for kind in MIX[:4]:
+        values = sorted(latencies.get(kind, []))
+        if values:
+            print(f"  {kind:14} p50 {percentile(values, 0.5):7.0f} ms  p99 {percentile(values, 0.99):7.0f} ms")
+    print(
+        f"  {'all':14} p50 {percentile(everything, 0.5):7.0f} ms  p99 {percentile(everything, 0.99):7.0f} ms  "
+        f"{len(everything) / elapsed:.0f} req/s  errors: {len(errors)} {sorted(set(errors))}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# List endpoints measured, all returning every row
+PATHS = ["/admin/orders", "/feedback/", "/customer/api/person/1/orders", "/chef/orders/pending", "/admin/api/dishes"]
+
+
+def create_schema():
+    try:
+        from app.migrations import upgrade
+    except ImportError:
+        # Trees from before versioned migrations
+        from app.database import create_tables as upgrade
+    upgrade()
+
+
+def seed(order_count: int):
+    """
+    order_count orders with three items each, a tenth of them with feedback,
+    spread over a few customers and statuses
+    """
+    from app.database import engine, Dish, Feedback, Order, OrderItem, Person
+
+    start = datetime(2026, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(Dish.__table__.insert(), [
+            {"name": f"Dish {i}", "category": f"Category {i % 5}", "price": 80 + i, "quantity": 100,
+             "description": "House special with seasonal vegetables"}
+            for i in range(1, 41)
+        ])
+        connection.execute(Person.__table__.insert(), [
+            {"username": f"customer{i}", "password": "x", "visit_count": 1} for i in range(1, 11)
+        ])
+        connection.execute(Order.__table__.insert(), [
+            {
+                "id": i,
+                "table_number": 1 + i % 20,
+                "unique_id": f"u{i}",
+                "person_id": 1 + i % 10,
+                "status": ("pending", "completed", "paid", "paid")[i % 4],
+                "total_amount": 300.0,
+                "item_count": 3,
+                "created_at": start + timedelta(minutes=i),
+                "updated_at": start + timedelta(minutes=i),
+            }
+            for i in range(1, order_count + 1)
+        ])
+        connection.execute(OrderItem.__table__.insert(), [
+            {"order_id": i, "dish_id": 1 + (i + k) % 40, "quantity": 1 + k, "unit_price": 100.0,
+             "remarks": "less spicy" if k == 0 else None}
+            for i in range(1, order_count + 1) for k in range(3)
+        ])
+        connection.execute(Feedback.__table__.insert(), [
+            {"order_id": i, "person_id": 1 + i % 10, "rating": 1 + i % 5, "comment": "Lovely food",
+             "created_at": start + timedelta(minutes=i)}
+            for i in range(1, order_count + 1, 10)
+        ])
+
+
+def best_of(runs: int, function):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_serialisation(app, runs: int):
+    """
+    Split /admin/orders into loading the rows and serialising them, the
+    latter both through FastAPI's response_model path (validate, convert to
+    plain Python with jsonable output, json.dumps) and through dump_json
+    """
+    from typing import List
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from app.database import SessionLocal, Order
+    from app.models.order import Order as OrderModel
+    from app.services.orders import query_orders, attach_person_details
+    from app.utils.fast_json import dump_json
+
+    field = next(route for route in app.routes if getattr(route, "path", None) == "/admin/orders").secure_cloned_response_field
+
+    db = SessionLocal()
+    try:
+        def load():
+            return attach_person_details(
+                query_orders(db).order_by(Order.created_at.desc(), Order.id.desc()).all()
+            )
+
+        def fastapi_path():
+            content = asyncio.run(serialize_response(field=field, response_content=orders))
+            return JSONResponse(content).body
+
+        def dump_json_path():
+            return dump_json(List[OrderModel], orders)
+
+        load_time = best_of(runs, lambda: (db.expunge_all(), load()))
+        orders = load()
+        print("  /admin/orders serialisation only (rows loaded once):")
+        print(f"    ORM load          {load_time * 1000:6.0f} ms")
+        print(f"    response_model    {best_of(runs, fastapi_path) * 1000:6.0f} ms")
+        print(f"    dump_json         {best_of(runs, dump_json_path) * 1000:6.0f} ms")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response time and size of the large list endpoints")
+    parser.add_argument("--orders", type=int, default=5000, help="orders to seed (default 5000)")
+    parser.add_argument("--runs", type=int, default=2, help="requests per case; the fastest counts")
+    parser.add_argument(
+        "--tree", default=PROJECT_DIR,
+        help="source tree to benchmark, e.g. a checkout from before the fast JSON path",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        # Time the responses without the per-statement query counter
+        os.environ["DB_QUERY_COUNTER"] = "0"
+        sys.path.insert(0, args.tree)
+        os.chdir(args.tree)
+
+        create_schema()
+        seed(args.orders)
+
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        print(f"{args.orders} orders, best of {args.runs}, against {args.tree}")
+        with TestClient(app) as client:
+            for path in PATHS:
+                for encoding in ("identity", "gzip"):
+                    best = None
+                    for _ in range(args.runs):
+                        start = time.perf_counter()
+                        response = client.get(path, headers={"accept-encoding": encoding})
+                        elapsed = time.perf_counter() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    wire = response.headers.get("content-length") or len(response.content)
+                    print(
+                        f"  {path:32} {encoding:8} {best * 1000:6.0f} ms  {int(wire) / 1024:8.0f} KB on the wire  "
+                        f"({len(response.json())} rows)"
+                    )
+
+            # Trees from before the fast JSON path have nothing to compare
+            if os.path.exists(os.path.join(args.tree, "app", "utils", "fast_json.py")):
+                time_serialisation(app, args.runs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
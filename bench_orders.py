@@ -0,0 +1,122 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def create_schema():
+    try:
+        from app.migrations import upgrade
+    except ImportError:
+        # Trees from before versioned migrations
+        from app.database import create_tables as upgrade
+    upgrade()
+
+
+def seed(dish_count: int):
+    from app.database import engine, Dish
+
+    with engine.begin() as connection:
+        connection.execute(Dish.__table__.insert(), [
+            {"name": f"Dish {i}", "category": f"Category {i % 5}", "price": 80 + i, "quantity": 100,
+             "description": "House special with seasonal vegetables"}
+            for i in range(1, dish_count + 1)
+        ])
+
+
+def count_statements():
+    """
+    Count the statements sent on the sync and (where the tree has one) async
+    engines
+
+    Returns:
+        list: A one-element counter, reset by the caller
+    """
+    from sqlalchemy import event
+    from app import database
+
+    counter = [0]
+
+    def count(*args):
+        counter[0] += 1
+
+    engines = [database.engine]
+    if hasattr(database, "async_engine"):
+        engines.append(database.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orders per second through POST /customer/api/orders")
+    parser.add_argument("--orders", type=int, default=300, help="orders placed per run (default 300)")
+    parser.add_argument("--items", type=int, default=6, help="items per order (default 6)")
+    parser.add_argument("--threads", type=int, default=16, help="clients placing orders at once (default 16)")
+    parser.add_argument(
+        "--tree", default=PROJECT_DIR,
+        help="source tree to benchmark, e.g. a checkout from before single-transaction orders",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        # Time the requests without the per-statement query counter
+        os.environ["DB_QUERY_COUNTER"] = "0"
+        sys.path.insert(0, args.tree)
+        os.chdir(args.tree)
+
+        create_schema()
+        seed(args.items)
+
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        body = {
+            "table_number": 2,
+            "unique_id": "bench",
+            "username": "bench",
+            "password": "x",
+            "items": [{"dish_id": dish_id, "quantity": 1} for dish_id in range(1, args.items + 1)],
+        }
+
+        def place_order(_=None):
+            response = client.post("/customer/api/orders", json=body)
+            response.raise_for_status()
+
+        print(f"{args.items} items per order, {args.orders} orders per run, against {args.tree}")
+        with TestClient(app) as client:
+            # The first order creates the customer and warms the pools
+            place_order()
+            statements = count_statements()
+            place_order()
+            print(f"  statements per order  {statements[0]:6}")
+
+            start = time.perf_counter()
+            for _ in range(args.orders):
+                place_order()
+            print(f"  sequential            {args.orders / (time.perf_counter() - start):6.0f} orders/s")
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as executor:
+                list(executor.map(place_order, range(args.orders)))
+            print(f"  {args.threads:2} threads            {args.orders / (time.perf_counter() - start):6.0f} orders/s")
+
+        # The async engine's worker thread would otherwise keep the
+        # interpreter alive after the benchmark
+        from app import database
+
+        if hasattr(database, "async_engine"):
+            import asyncio
+
+            asyncio.run(database.async_engine.dispose())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Cumulative import time of app.main (as reported by -X importtime) that a
+# worker may spend before it can serve requests, in milliseconds
+IMPORT_BUDGET_MS = int(os.getenv("IMPORT_BUDGET_MS", "1200"))
+
+# Heavy dependencies that are loaded on first use (phone auth, bill PDFs,
+# Parquet/Arrow exports, image uploads); importing any of them at startup
+# fails the check
+LAZY_MODULES = ["firebase_admin", "google.auth", "reportlab", "pyarrow", "PIL"]
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_APP = (
+    "import sys, app.main; "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    (name, depth, self us, cumulative us) of each module in -X importtime
+    output, where depth 0 is a module imported by the command itself
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure(env: dict):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_APP],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing app.main failed:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+    total = next(cumulative for name, depth, _, cumulative in modules if name == "app.main" and depth == 0)
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total / 1000, modules, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the cold import time of app.main against a budget")
+    parser.add_argument("--budget", type=int, default=IMPORT_BUDGET_MS, help="milliseconds (default %(default)s)")
+    parser.add_argument("--runs", type=int, default=3, help="imports to time; the fastest counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # A freshly migrated database, so app.main's schema check passes
+        # without touching the real one
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'import_budget.db')}")
+        env.pop("ASYNC_DATABASE_URL", None)
+        env.pop("ANALYTICS_DATABASE_URL", None)
+        subprocess.run([sys.executable, "-m", "app.migrations", "upgrade"], cwd=PROJECT_DIR, env=env,
+                       check=True, capture_output=True)
+
+        runs = [measure(env) for _ in range(args.runs)]
+
+    total_ms, modules, loaded = min(runs, key=lambda run: run[0])
+
+    # Direct imports of app.main, slowest first
+    children = [module for module in modules if module[1] == 1]
+    children.sort(key=lambda module: module[3], reverse=True)
+    print(f"import app.main: {total_ms:.0f} ms (budget {args.budget} ms)")
+    for name, _, _, cumulative in children[:10]:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+    failed = False
+    if total_ms > args.budget:
+        print(f"Over budget by {total_ms - args.budget:.0f} ms")
+        failed = True
+    if loaded:
+        print(f"Loaded at startup but should be imported on first use: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("Within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
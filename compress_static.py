@@ -0,0 +1,85 @@
+import gzip
+import os
+import sys
+
+# brotli is optional; without it only .gz files are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIRS = ["app/static", "frontend/build"]
+
+# Text formats worth compressing; images are already compressed
+COMPRESSIBLE_EXTENSIONS = {
+    ".js", ".mjs", ".css", ".html", ".svg", ".json", ".txt", ".map", ".xml", ".ico", ".wasm",
+}
+# Smaller files don't gain enough to be worth a second request path
+MIN_SIZE = 1024
+
+
+def _is_up_to_date(source: str, target: str) -> bool:
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def _write(target: str, data: bytes):
+    temp_path = f"{target}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, target)
+
+
+def compress_file(path: str) -> list:
+    """
+    Write .gz and .br siblings of a file, skipping ones that are already
+    newer than it and removing ones that would not be smaller
+
+    Returns:
+        list: Paths of the files written
+    """
+    written = []
+    with open(path, "rb") as f:
+        data = f.read()
+
+    variants = [(".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda: brotli.compress(data, quality=11)))
+
+    for suffix, compress in variants:
+        target = f"{path}{suffix}"
+        if _is_up_to_date(path, target):
+            continue
+        compressed = compress()
+        if len(compressed) >= len(data):
+            # Don't leave a variant of an earlier version of the file behind
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        _write(target, compressed)
+        written.append(target)
+    return written
+
+
+def compress_static(directories=None):
+    directories = directories or STATIC_DIRS
+    if brotli is None:
+        print("brotli is not installed, writing .gz files only (pip install brotli)")
+
+    count = 0
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        print(f"Compressing static files in {directory}...")
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                    continue
+                if os.path.getsize(path) < MIN_SIZE:
+                    continue
+                count += len(compress_file(path))
+    print(f"Wrote {count} compressed files")
+
+
+if __name__ == "__main__":
+    compress_static(sys.argv[1:])
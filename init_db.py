@@ -1,5 +1,4 @@
 from app.database import (
-    create_tables,
     SessionLocal,
     Dish,
     Person,
@@ -7,8 +6,9 @@ from app.database import (
     LoyaltyProgram,
     SelectionOffer,
     Table,
+    engine,
 )
-from sqlalchemy import create_engine
+from app.migrations import upgrade
 from datetime import datetime, timezone
 import os
 import sys
@@ -19,14 +19,10 @@ def init_db(force_reset=False):
     if force_reset:
         # Drop all tables and recreate them
         print("Forcing database reset...")
-        Base.metadata.drop_all(
-            bind=create_engine(
-                "sqlite:///./tabble_new.db", connect_args={"check_same_thread": False}
-            )
-        )
+        Base.metadata.drop_all(bind=engine)
 
-    # Create tables
-    create_tables()
+    # Create tables and apply pending migrations
+    upgrade()
 
     # Create a database session
     db = SessionLocal()
@@ -0,0 +1,20 @@
+from app.database import SessionLocal
+from app.migrations import check_schema
+from app.services import sales_rollup
+
+
+def rebuild_sales_rollup():
+    # Make sure the rollup tables exist
+    check_schema()
+
+    db = SessionLocal()
+    try:
+        print("Rebuilding daily sales rollup from order history...")
+        rows = sales_rollup.rebuild(db)
+        print(f"Daily sales rollup rebuilt with {rows} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_sales_rollup()
@@ -1,6 +1,8 @@
-import uvicorn
 import os
 import socket
+import sys
+
+from app.server import serve, WEB_PORT
 
 
 def get_ip_address():
@@ -22,17 +24,22 @@ if __name__ == "__main__":
     # Create static/images directory if it doesn't exist
     os.makedirs("app/static/images", exist_ok=True)
 
-    # Check for force reset flag
-
     # Get the IP address
     ip_address = get_ip_address()
 
     # Display access information
     print("\n" + "=" * 50)
 
-    print(f"Access from other devices at: http://{ip_address}:8000")
+    print(f"Access from other devices at: http://{ip_address}:{WEB_PORT}")
     print("=" * 50 + "\n")
 
-    # Run the application on your IP address
-    # Using 0.0.0.0 allows connections from any IP
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    if "--reload" in sys.argv:
+        # Development: a single process restarted whenever the code changes
+        import uvicorn
+        from app.migrations import upgrade
+
+        upgrade()
+        uvicorn.run("app.main:app", host="0.0.0.0", port=WEB_PORT, reload=True)
+    else:
+        # Production: migrations once, then the worker (see app/server.py)
+        serve()